@@ -10,19 +10,42 @@ This script automates the process of:
 
 # Standard library imports
 import argparse
-import configparser
+import asyncio
+import hashlib
 import json
 import logging
 import os
-import subprocess
 import sys
-from datetime import datetime, timedelta
-from pathlib import Path
+import time
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Sibling scripts run in-process when importable, otherwise as subprocesses
+try:
+    import outlook_cal_status
+except ImportError as e:
+    logger.debug(f"outlook_cal_status not importable, using subprocess: {e}")
+    outlook_cal_status = None
+
+try:
+    import gicisky_writer
+except ImportError as e:
+    logger.debug(f"gicisky_writer not importable, using subprocess: {e}")
+    gicisky_writer = None
+
+# watchfiles is only needed for --daemon
+try:
+    from watchfiles import Change, awatch
+except ImportError:
+    Change = awatch = None
+
 # Default configuration
 DEFAULT_DEVICE_ADDRESS = "PICKSMART"
 DEFAULT_ROTATION = 90
@@ -30,74 +53,118 @@ DEFAULT_MIRROR_X = False
 DEFAULT_MIRROR_Y = False
 STATUS_IMAGE_PATH = "status_output.png"
 FRESHNESS_THRESHOLD_MINUTES = 5
-DEFAULT_CONFIG_FILE = "calendar_tag_config.ini"
+DEFAULT_CONFIG_FILE = "calendar_tag_config.toml"
+LEGACY_CONFIG_FILE = "calendar_tag_config.ini"
+COMMAND_TIMEOUT_SECONDS = 60
+KILL_GRACE_SECONDS = 5
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bletag_calendar")
+LAST_PUSH_SIGNATURE_FILE = os.path.join(CACHE_DIR, "last_push.sig")
+
+# Fixed leading parts of the sibling script command lines
+_OUTLOOK_CMD_PREFIX = ("python", "outlook_cal_status.py")
+_OUTLOOK_ARGV_PREFIX = ("--save-image", STATUS_IMAGE_PATH)
+_GICISKY_CMD_PREFIX = ("python", "gicisky_writer.py")
+
+# Fallback values for options that may come from the command line or the config file
+CONFIG_DEFAULTS = {
+    'ics_url': None,
+    'tag_size': "2.9",
+    'check_window': 5,
+    'status_file': "calendar_status.json",
+    'device': DEFAULT_DEVICE_ADDRESS,
+    'rotation': DEFAULT_ROTATION,
+    'mirror_x': DEFAULT_MIRROR_X,
+    'mirror_y': DEFAULT_MIRROR_Y,
+    'scan_timeout': 10,
+    'connection_timeout': 30,
+    'compression': False,
+    'no_red': False,
+    'freshness_threshold': FRESHNESS_THRESHOLD_MINUTES,
+}
+
+# Config file layout: (section, key) -> (option name, type, log line format)
+CONFIG_SCHEMA = {
+    ('calendar', 'ics_url'): ('ics_url', str, "   ICS URL: {:.50}..."),
+    ('calendar', 'tag_size'): ('tag_size', str, "   Tag size: {}\""),
+    ('calendar', 'check_window'): ('check_window', int, "   Check window: {} minutes"),
+    ('device', 'address'): ('device', str, "   Device address: {}"),
+    ('device', 'rotation'): ('rotation', int, "   Rotation: {}°"),
+    ('device', 'mirror_x'): ('mirror_x', bool, "   Mirror X: {}"),
+    ('device', 'mirror_y'): ('mirror_y', bool, "   Mirror Y: {}"),
+    ('device', 'scan_timeout'): ('scan_timeout', int, "   BLE scan timeout: {}s"),
+    ('device', 'connection_timeout'): ('connection_timeout', int, "   BLE connection timeout: {}s"),
+    ('device', 'compression'): ('compression', bool, "   Compression: {}"),
+    ('device', 'no_red'): ('no_red', bool, "   No red channel: {}"),
+    ('options', 'freshness_threshold'): ('freshness_threshold', int, "   Freshness threshold: {} minutes"),
+    ('options', 'status_file'): ('status_file', str, "   Status file: {}"),
+}
+
+# Parsed configuration keyed by (path, mtime_ns, size); kept in memory only, since parsing
+# the small config file is cheap and a stale on-disk copy could outlive a schema change
+_CFG_CACHE = {}
+
+# Daemon mode keeps one BLE connection to the tag open across pushes
+_BLE_CLIENT = None
+
+
+def _read_config_sections(config_path):
+    """Read a TOML or legacy INI config file into {section: {key: value}}"""
+    if config_path.endswith('.ini'):
+        import configparser  # only needed for legacy INI files
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        return {name: dict(config[name]) for name in config.sections()}
+    
+    if tomllib is None:
+        raise RuntimeError("TOML config files need Python 3.11+; use an .ini config file instead")
+    
+    with open(config_path, 'rb') as f:
+        return tomllib.load(f)
+
+
+def _convert_config_value(value, value_type):
+    """Convert a config value to value_type, accepting INI strings as well as TOML types"""
+    if value_type is bool and isinstance(value, str):
+        import configparser  # INI booleans follow configparser's rules
+        if value.lower() not in configparser.ConfigParser.BOOLEAN_STATES:
+            raise ValueError(f"Not a boolean: {value}")
+        return configparser.ConfigParser.BOOLEAN_STATES[value.lower()]
+    return value_type(value)
 
 
 def load_config_file(config_path):
     """Load configuration from file"""
-    config = configparser.ConfigParser()
     config_data = {}
     
-    if not os.path.exists(config_path):
-        logger.info(f"📄 Config file not found: {config_path}")
+    try:
+        st = os.stat(config_path)
+    except FileNotFoundError:
+        logger.info("📄 Config file not found: %s", config_path)
         return config_data
     
+    # Skip parsing entirely when the file is unchanged since it was last parsed
+    cache_key = (os.path.abspath(config_path), st.st_mtime_ns, st.st_size)
+    cached = _CFG_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info("📋 Using cached configuration for: %s (%d values)", config_path, len(cached))
+        return dict(cached)
+    
     try:
-        config.read(config_path)
-        logger.info(f"📋 Loading configuration from: {config_path}")
-        
-        # Calendar settings
-        if config.has_section('calendar'):
-            calendar_section = config['calendar']
-            if calendar_section.get('ics_url'):
-                config_data['ics_url'] = calendar_section.get('ics_url')
-                logger.info(f"   ICS URL: {config_data['ics_url'][:50]}...")
-            if calendar_section.get('tag_size'):
-                config_data['tag_size'] = calendar_section.get('tag_size')
-                logger.info(f"   Tag size: {config_data['tag_size']}\"")
-            if calendar_section.get('check_window'):
-                config_data['check_window'] = calendar_section.getint('check_window')
-                logger.info(f"   Check window: {config_data['check_window']} minutes")
-        
-        # Device settings
-        if config.has_section('device'):
-            device_section = config['device']
-            if device_section.get('address'):
-                config_data['device'] = device_section.get('address')
-                logger.info(f"   Device address: {config_data['device']}")
-            if device_section.get('rotation'):
-                config_data['rotation'] = device_section.getint('rotation')
-                logger.info(f"   Rotation: {config_data['rotation']}°")
-            if device_section.get('mirror_x'):
-                config_data['mirror_x'] = device_section.getboolean('mirror_x')
-                logger.info(f"   Mirror X: {config_data['mirror_x']}")
-            if device_section.get('mirror_y'):
-                config_data['mirror_y'] = device_section.getboolean('mirror_y')
-                logger.info(f"   Mirror Y: {config_data['mirror_y']}")
-            if device_section.get('scan_timeout'):
-                config_data['scan_timeout'] = device_section.getint('scan_timeout')
-                logger.info(f"   BLE scan timeout: {config_data['scan_timeout']}s")
-            if device_section.get('connection_timeout'):
-                config_data['connection_timeout'] = device_section.getint('connection_timeout')
-                logger.info(f"   BLE connection timeout: {config_data['connection_timeout']}s")
-            if device_section.get('compression'):
-                config_data['compression'] = device_section.getboolean('compression')
-                logger.info(f"   Compression: {config_data['compression']}")
-            if device_section.get('no_red'):
-                config_data['no_red'] = device_section.getboolean('no_red')
-                logger.info(f"   No red channel: {config_data['no_red']}")
+        sections = _read_config_sections(config_path)
         
-        # Options settings
-        if config.has_section('options'):
-            options_section = config['options']
-            if options_section.get('freshness_threshold'):
-                config_data['freshness_threshold'] = options_section.getint('freshness_threshold')
-                logger.info(f"   Freshness threshold: {config_data['freshness_threshold']} minutes")
-            if options_section.get('status_file'):
-                config_data['status_file'] = options_section.get('status_file')
-                logger.info(f"   Status file: {config_data['status_file']}")
+        for (section, key), (name, value_type, _) in CONFIG_SCHEMA.items():
+            value = sections.get(section, {}).get(key)
+            if value is None or value == "":
+                continue
+            config_data[name] = _convert_config_value(value, value_type)
         
-        logger.info(f"✅ Successfully loaded {len(config_data)} configuration values")
+        # One log record for the whole file, formatted only when INFO is enabled
+        if logger.isEnabledFor(logging.INFO):
+            _msgs = [log_format.format(config_data[name])
+                     for name, _, log_format in CONFIG_SCHEMA.values() if name in config_data]
+            logger.info("📋 Loaded configuration from: %s\n%s", config_path, "\n".join(_msgs))
+        logger.info("✅ Successfully loaded %d configuration values", len(config_data))
+        _CFG_CACHE[cache_key] = dict(config_data)
         
     except Exception as e:
         logger.error(f"❌ Error loading config file {config_path}: {e}")
@@ -105,17 +172,15 @@ def load_config_file(config_path):
     return config_data
 
 
-def create_example_config(config_path):
-    """Create an example configuration file"""
-    config_content = """# Calendar Tag Configuration File
+EXAMPLE_CONFIG_TEMPLATE = """# Calendar Tag Configuration File
 # This file contains default settings for the calendar tag wrapper script
 
 [calendar]
 # Your Outlook calendar ICS URL (get this from Outlook -> Calendar Settings -> Shared Calendars)
-ics_url = https://outlook.live.com/owa/calendar/your-calendar-id/reachableFreeBusy.ics
+ics_url = {q}https://outlook.live.com/owa/calendar/your-calendar-id/reachableFreeBusy.ics{q}
 
 # Tag size in inches (1.54, 2.13, 2.9, 4.2, or 7.5)
-tag_size = 2.9
+tag_size = {q}2.9{q}
 
 # Minutes to check ahead for upcoming meetings
 check_window = 5
@@ -123,7 +188,7 @@ check_window = 5
 [device]
 # Bluetooth device address of your e-ink tag
 # You can find this by scanning for BLE devices or checking your device pairing info
-address = PICKSMART
+address = {q}PICKSMART{q}
 
 # Image rotation in degrees (0, 90, 180, 270)
 rotation = 90
@@ -151,12 +216,27 @@ no_red = false
 freshness_threshold = 5
 
 # File to track calendar status changes
-status_file = calendar_status.json
+status_file = {q}calendar_status.json{q}
 """
+
+
+# TOML strings are quoted, INI values are not
+_EXAMPLE_CONFIG_TOML_BYTES = EXAMPLE_CONFIG_TEMPLATE.format(q='"').encode()
+_EXAMPLE_CONFIG_INI_BYTES = EXAMPLE_CONFIG_TEMPLATE.format(q='').encode()
+
+
+def create_example_config(config_path):
+    """Create an example configuration file (TOML, or INI for .ini paths)"""
+    config_bytes = _EXAMPLE_CONFIG_INI_BYTES if config_path.endswith('.ini') else _EXAMPLE_CONFIG_TOML_BYTES
     
     try:
-        with open(config_path, 'w') as f:
-            f.write(config_content)
+        fd = os.open(config_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(config_bytes)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
         logger.info(f"📝 Created example config file: {config_path}")
         return True
     except Exception as e:
@@ -164,24 +244,57 @@ status_file = calendar_status.json
         return False
 
 
-def run_command(cmd_args, description):
+async def _kill_process(proc):
+    """Kill a child process and reap it, waiting at most KILL_GRACE_SECONDS"""
+    if proc.returncode is not None:
+        return
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(proc.wait(), timeout=KILL_GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ Process {proc.pid} did not exit after kill")
+
+
+async def run_command(cmd_args, description, timeout=COMMAND_TIMEOUT_SECONDS):
     """Run a command and return success status"""
     try:
-        logger.info(f"🚀 {description}")
-        logger.info(f"   Command: {' '.join(cmd_args)}")
+        logger.info("🚀 %s\n   Command: %s", description, ' '.join(cmd_args))
         
-        result = subprocess.run(
-            cmd_args,
-            check=True,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
+        proc = await asyncio.create_subprocess_exec(
+            *cmd_args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
         )
         
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await _kill_process(proc)
+            logger.error(f"⏰ {description} timed out after {timeout} seconds")
+            return False
+        except asyncio.CancelledError:
+            # Don't leave the child running when the wrapper is interrupted
+            await _kill_process(proc)
+            raise
+        
+        stdout = stdout.decode(errors="replace") if stdout else ""
+        stderr = stderr.decode(errors="replace") if stderr else ""
+        
+        if proc.returncode != 0:
+            logger.error(f"❌ {description} failed with return code {proc.returncode}")
+            if stdout:
+                logger.error(f"   STDOUT: {stdout}")
+            if stderr:
+                logger.error(f"   STDERR: {stderr}")
+            return False
+        
         # Check for failure indicators in the output
-        output = result.stdout.strip() if result.stdout else ""
+        output = stdout.strip()
         if output:
-            logger.info(f"   Output: {output}")
+            logger.info("   Output: %s", output)
             
         # Check for common failure patterns in output
         failure_indicators = ["❌ Failed", "Error:", "ERROR:", "Exception:", "Traceback"]
@@ -189,19 +302,35 @@ def run_command(cmd_args, description):
             logger.error(f"❌ {description} failed (detected failure in output)")
             return False
         
-        logger.info(f"✅ {description} completed successfully")
+        logger.info("✅ %s completed successfully", description)
         return True
         
-    except subprocess.CalledProcessError as e:
-        logger.error(f"❌ {description} failed with return code {e.returncode}")
-        if e.stdout:
-            logger.error(f"   STDOUT: {e.stdout}")
-        if e.stderr:
-            logger.error(f"   STDERR: {e.stderr}")
+    except Exception as e:
+        logger.error(f"💥 {description} failed: {e}")
         return False
+
+
+async def run_entrypoint(entrypoint, argv, description, timeout=COMMAND_TIMEOUT_SECONDS):
+    """Run a sibling script's main() in-process and return success status"""
+    try:
+        logger.info("🚀 %s\n   Arguments: %s", description, ' '.join(argv))
+        
+        try:
+            exit_code = await asyncio.wait_for(entrypoint(argv), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"⏰ {description} timed out after {timeout} seconds")
+            return False
         
-    except subprocess.TimeoutExpired:
-        logger.error(f"⏰ {description} timed out after 5 minutes")
+        if exit_code:
+            logger.error(f"❌ {description} failed with exit code {exit_code}")
+            return False
+        
+        logger.info("✅ %s completed successfully", description)
+        return True
+        
+    except SystemExit as e:
+        # argparse reports invalid arguments by exiting
+        logger.error(f"❌ {description} exited with code {e.code}")
         return False
         
     except Exception as e:
@@ -209,27 +338,64 @@ def run_command(cmd_args, description):
         return False
 
 
-def check_file_freshness(file_path, threshold_minutes=FRESHNESS_THRESHOLD_MINUTES):
-    """Check if file was modified within the threshold time"""
+def _status_signature(status_file_path):
+    """Return the status file's image hash (or a digest of its contents), or None if it can't be read"""
     try:
-        if not os.path.exists(file_path):
-            logger.warning(f"📄 File not found: {file_path}")
-            return False
+        with open(status_file_path, 'rb') as f:
+            contents = f.read()
+    except OSError:
+        return None
+    # Key on the rendered pixels: the status file is also rewritten when only the status key
+    # changed, and that mustn't send the same image to the tag again
+    try:
+        image_hash = json.loads(contents).get("image_hash")
+    except (ValueError, AttributeError):
+        image_hash = None
+    return image_hash or hashlib.blake2b(contents, digest_size=16).hexdigest()
+
+
+def _load_last_push_signature():
+    """Return the status signature recorded after the last successful push"""
+    try:
+        with open(LAST_PUSH_SIGNATURE_FILE, 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _save_last_push_signature(signature):
+    """Record the status signature of the image that was just sent to the tag"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(LAST_PUSH_SIGNATURE_FILE, 'w') as f:
+            f.write(signature)
+    except OSError as e:
+        logger.debug(f"Could not write {LAST_PUSH_SIGNATURE_FILE}: {e}")
+
+
+def check_file_freshness(file_path, threshold_minutes=FRESHNESS_THRESHOLD_MINUTES, file_stat=None):
+    """Check if file was modified within the threshold time, reusing file_stat if provided"""
+    try:
+        if file_stat is None:
+            try:
+                file_stat = os.stat(file_path)
+            except FileNotFoundError:
+                logger.warning(f"📄 File not found: {file_path}")
+                return False
             
-        file_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-        current_time = datetime.now()
-        time_diff = current_time - file_mtime
-        
-        logger.info(f"📅 File modification time: {file_mtime.strftime('%Y-%m-%d %H:%M:%S')}")
-        logger.info(f"🕐 Current time: {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        logger.info(f"⏱️  Time difference: {time_diff.total_seconds()/60:.1f} minutes")
+        current_time = time.time()
+        age = current_time - file_stat.st_mtime
+        is_fresh = age <= threshold_minutes * 60
         
-        is_fresh = time_diff <= timedelta(minutes=threshold_minutes)
-        
-        if is_fresh:
-            logger.info(f"✅ File is fresh (modified within {threshold_minutes} minutes)")
-        else:
-            logger.info(f"⚠️ File is stale (modified more than {threshold_minutes} minutes ago)")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📅 File modification time: %s", time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(file_stat.st_mtime)))
+            logger.info("🕐 Current time: %s", time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(current_time)))
+            logger.info("⏱️  Time difference: %.1f minutes", age / 60)
+            
+            if is_fresh:
+                logger.info("✅ File is fresh (modified within %s minutes)", threshold_minutes)
+            else:
+                logger.info("⚠️ File is stale (modified more than %s minutes ago)", threshold_minutes)
             
         return is_fresh
         
@@ -238,7 +404,248 @@ def check_file_freshness(file_path, threshold_minutes=FRESHNESS_THRESHOLD_MINUTE
         return False
 
 
-def main():
+async def generate_status_image(args):
+    """Run outlook_cal_status.py to (re)generate the status image, returning success"""
+    outlook_argv = [
+        *_OUTLOOK_ARGV_PREFIX,
+        "--tag-size", args.tag_size,
+        "--check-window", str(args.check_window),
+        "--status-file", args.status_file
+    ]
+    
+    if args.ics_url:
+        outlook_argv.extend(["--ics-url", args.ics_url])
+    
+    if args.force_calendar_update:
+        outlook_argv.append("--force-update")
+    
+    if args.verbose:
+        outlook_argv.append("--verbose")
+    
+    if outlook_cal_status is not None:
+        return await run_entrypoint(outlook_cal_status.main, outlook_argv, "Generating calendar status image")
+    
+    outlook_cmd = [*_OUTLOOK_CMD_PREFIX, *outlook_argv]
+    return await run_command(outlook_cmd, "Generating calendar status image")
+
+
+def _on_tag_disconnected(client):
+    """Forget the persistent connection so the next push reconnects"""
+    global _BLE_CLIENT
+    if _BLE_CLIENT is client:
+        logger.info("📴 E-ink tag disconnected, will reconnect on next push")
+        _BLE_CLIENT = None
+
+
+async def _write_to_tag(args):
+    """Write the status image over the persistent BLE connection, connecting first if needed"""
+    global _BLE_CLIENT
+    from PIL import Image
+    
+    if _BLE_CLIENT is None or not _BLE_CLIENT.is_connected:
+        _BLE_CLIENT = await gicisky_writer.connect_to_tag(
+            args.device, args.scan_timeout, args.connection_timeout,
+            disconnected_callback=_on_tag_disconnected
+        )
+        if _BLE_CLIENT is None:
+            return False
+    
+    device_config = gicisky_writer.DeviceConfig(
+        red=not args.no_red,
+        rotation=args.rotation,
+        mirror_x=args.mirror_x,
+        mirror_y=args.mirror_y,
+        compression=args.compression
+    )
+    with Image.open(STATUS_IMAGE_PATH) as image:
+        # Decode now: the refresh loop may replace the file while the transfer awaits
+        image.load()
+        success = await gicisky_writer.write_image_with_client(_BLE_CLIENT, device_config, image)
+    if not success:
+        logger.error("💥 E-ink tag rejected the image transfer")
+    return success
+
+
+async def _push_to_tag(args, timeout):
+    """Send the status image over the persistent BLE connection within timeout seconds"""
+    global _BLE_CLIENT
+    try:
+        if await asyncio.wait_for(_write_to_tag(args), timeout=timeout):
+            return True
+    except asyncio.TimeoutError:
+        logger.error(f"⏰ Sending image to e-ink device timed out after {timeout} seconds")
+    except Exception as e:
+        logger.error(f"💥 Sending image to e-ink device failed: {e}")
+    
+    # Drop the connection so the next push starts from a clean one; after a failed
+    # transfer the tag's protocol state is unknown
+    client, _BLE_CLIENT = _BLE_CLIENT, None
+    if client is not None and client.is_connected:
+        try:
+            await client.disconnect()
+        except Exception as e:
+            logger.debug(f"Disconnect after failed push failed: {e}")
+    return False
+
+
+def build_gicisky_argv(args):
+    """Build the gicisky_writer.py argument list, with the image path last"""
+    extras = []
+    if args.mirror_x:
+        extras.append("--mirror-x")
+    if args.mirror_y:
+        extras.append("--mirror-y")
+    if args.compression:
+        extras.append("--compression")
+    if args.no_red:
+        extras.append("--no-red")
+    
+    return [
+        "--device", args.device,
+        "--rotation", str(args.rotation),
+        "--scan-timeout", str(args.scan_timeout),
+        "--connection-timeout", str(args.connection_timeout),
+        *extras,
+        STATUS_IMAGE_PATH,
+    ]
+
+
+async def send_image_to_tag(args):
+    """Run gicisky_writer.py to send the status image to the e-ink tag, returning success"""
+    # The BLE scan and connection get their own budget on top of the transfer time
+    timeout = COMMAND_TIMEOUT_SECONDS + args.scan_timeout + args.connection_timeout
+    
+    if args.daemon and gicisky_writer is not None:
+        return await _push_to_tag(args, timeout)
+    
+    gicisky_argv = build_gicisky_argv(args)
+    
+    if gicisky_writer is not None:
+        return await run_entrypoint(gicisky_writer.main, gicisky_argv, "Sending image to e-ink device", timeout)
+    
+    gicisky_cmd = [*_GICISKY_CMD_PREFIX, *gicisky_argv]
+    return await run_command(gicisky_cmd, "Sending image to e-ink device", timeout)
+
+
+async def run_workflow(args):
+    """Run the generate / freshness check / send workflow once and return an exit code"""
+    # Step 1: Generate calendar status image
+    logger.info("\n📅 STEP 1: GENERATING CALENDAR STATUS IMAGE")
+    logger.info("-" * 50)
+    
+    success = await generate_status_image(args)
+    
+    if not success:
+        logger.error("💥 Failed to generate calendar status image")
+        return 1
+    
+    # Check if image was actually generated (it might be skipped if status unchanged)
+    try:
+        image_stat = os.stat(STATUS_IMAGE_PATH)
+    except FileNotFoundError:
+        logger.info("📄 No image generated (status unchanged)")
+        logger.info("💡 Calendar status hasn't changed, no update needed")
+        return 0
+    
+    # The status file records the hash of every newly generated image, so an unchanged
+    # signature means the tag already shows this image
+    status_signature = _status_signature(args.status_file)
+    if (status_signature and status_signature == _load_last_push_signature()
+            and not (args.force_send or args.force_calendar_update)):
+        logger.info("📄 Image already sent to device (status unchanged since last push)")
+        logger.info("💡 Use --force-send to send anyway")
+        return 0
+    
+    # Step 2: Check if image is fresh
+    logger.info("\n⏰ STEP 2: CHECKING IMAGE FRESHNESS")
+    logger.info("-" * 50)
+    
+    is_fresh = check_file_freshness(STATUS_IMAGE_PATH, args.freshness_threshold, image_stat)
+    
+    if not is_fresh and not args.force_send:
+        logger.warning("⚠️ Image is not fresh and --force-send not specified")
+        logger.info("💡 Use --force-send to send anyway, or check if calendar generation failed")
+        return 0
+    
+    if args.dry_run:
+        logger.info("🏃 DRY RUN: Would send image to device, but skipping due to --dry-run")
+        
+        # Build complete command string
+        cmd_preview = " ".join([*_GICISKY_CMD_PREFIX, *build_gicisky_argv(args)])
+        logger.info(f"   Would run: {cmd_preview}")
+        return 0
+    
+    # Step 3: Send to e-ink device
+    logger.info("\n📡 STEP 3: SENDING TO E-INK DEVICE")
+    logger.info("-" * 50)
+    
+    success = await send_image_to_tag(args)
+    
+    if success:
+        if status_signature:
+            _save_last_push_signature(status_signature)
+        logger.info("\n🎉 WORKFLOW COMPLETED SUCCESSFULLY!")
+        logger.info("=" * 60)
+        logger.info("✅ Calendar status has been updated on your e-ink tag")
+        return 0
+    else:
+        logger.error("\n💥 WORKFLOW FAILED!")
+        logger.error("=" * 60)
+        logger.error("❌ Failed to send image to e-ink device")
+        return 1
+
+
+async def _calendar_refresh_loop(args):
+    """Regenerate the status image every check window"""
+    # Refreshing once per look-ahead window means an upcoming meeting is never missed
+    while True:
+        await asyncio.sleep(args.check_window * 60)
+        logger.info("\n📅 DAEMON: REFRESHING CALENDAR STATUS")
+        if not await generate_status_image(args):
+            logger.error("💥 Failed to generate calendar status image, will retry next cycle")
+
+
+async def _file_watch_loop(args):
+    """Send the status image to the tag every time it is rewritten"""
+    image_path = os.path.abspath(STATUS_IMAGE_PATH)
+    
+    async for changes in awatch(os.path.dirname(image_path), recursive=False):
+        if not any(change != Change.deleted and os.path.abspath(path) == image_path
+                   for change, path in changes):
+            continue
+        
+        logger.info("\n📡 DAEMON: STATUS IMAGE CHANGED, SENDING TO E-INK DEVICE")
+        if args.dry_run:
+            logger.info("🏃 DRY RUN: Would send image to device, but skipping due to --dry-run")
+            continue
+        
+        status_signature = _status_signature(args.status_file)
+        if await send_image_to_tag(args):
+            if status_signature:
+                _save_last_push_signature(status_signature)
+            logger.info("✅ Calendar status has been updated on your e-ink tag")
+        else:
+            logger.error("❌ Failed to send image to e-ink device, will retry on next change")
+
+
+async def run_daemon(args):
+    """Run the workflow once, then keep refreshing and push image changes as they happen"""
+    if awatch is None:
+        logger.error("❌ --daemon requires the watchfiles package (pip install watchfiles)")
+        return 1
+    
+    logger.info(f"👀 DAEMON MODE: refreshing every {args.check_window} minutes, watching {STATUS_IMAGE_PATH}")
+    
+    try:
+        await run_workflow(args)
+        await asyncio.gather(_calendar_refresh_loop(args), _file_watch_loop(args))
+    finally:
+        if _BLE_CLIENT is not None and _BLE_CLIENT.is_connected:
+            await _BLE_CLIENT.disconnect()
+    return 0
+
+
+async def main():
     parser = argparse.ArgumentParser(
         description="Automated Calendar Status to E-ink Tag Workflow",
         epilog="""
@@ -248,19 +655,21 @@ This script automates the complete workflow:
 3. If fresh, sends the image to the e-ink tag with proper rotation and mirroring
 
 Configuration File:
-  The script can read settings from a configuration file (default: calendar_tag_config.ini).
+  The script can read settings from a configuration file (default: calendar_tag_config.toml,
+  falling back to calendar_tag_config.ini). Files ending in .ini are read as INI, others as TOML.
   Use --create-config to generate an example configuration file.
   Command line arguments override configuration file settings.
 
 Examples:
   %(prog)s                                    # Use all defaults with status change detection
-  %(prog)s --config my_config.ini            # Use custom configuration file
+  %(prog)s --config my_config.toml           # Use custom configuration file
   %(prog)s --create-config                   # Create example configuration file
   %(prog)s --device AA:BB:CC:DD:EE:FF         # Override device from config
   %(prog)s --rotation 180                    # Different rotation, no mirroring (default)
   %(prog)s --ics-url "https://..."           # Use different calendar URL
   %(prog)s --force-calendar-update           # Force calendar update even if status unchanged
   %(prog)s --dry-run                         # Test without sending to device
+  %(prog)s --daemon                          # Keep running instead of being launched by cron
         """,
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
@@ -271,85 +680,85 @@ Examples:
     parser.add_argument("--create-config", action="store_true",
                        help="Create an example configuration file and exit")
     
-    # Parse args once to check for --create-config and --config
-    args, remaining = parser.parse_known_args()
-    
-    # Handle config file creation
-    if args.create_config:
-        config_path = args.config
-        if create_example_config(config_path):
-            logger.info(f"✅ Example configuration file created: {config_path}")
-            logger.info("📝 Please edit the file with your calendar URL and device address")
-            return 0
-        else:
-            logger.error("❌ Failed to create configuration file")
-            return 1
-    
-    # Load configuration file
-    config_data = load_config_file(args.config)
-    
-    # Calendar generation options (with config file defaults)
-    parser.add_argument("--ics-url", 
-                       default=config_data.get('ics_url'),
+    # Calendar generation options (config file values are merged in after parsing)
+    parser.add_argument("--ics-url", default=argparse.SUPPRESS,
                        help="Outlook ICS calendar URL (passed to outlook_cal_status.py)")
     parser.add_argument("--tag-size", choices=["1.54", "2.13", "2.9", "4.2", "7.5"], 
-                       default=config_data.get('tag_size', "2.9"),
+                       default=argparse.SUPPRESS,
                        help="Tag size in inches (default: 2.9)")
-    parser.add_argument("--check-window", type=int, 
-                       default=config_data.get('check_window', 5),
+    parser.add_argument("--check-window", type=int, default=argparse.SUPPRESS,
                        help="Minutes to check ahead for meetings (default: 5)")
-    parser.add_argument("--status-file", 
-                       default=config_data.get('status_file', "calendar_status.json"),
+    parser.add_argument("--status-file", default=argparse.SUPPRESS,
                        help="File to track status changes (default: calendar_status.json)")
     parser.add_argument("--force-calendar-update", action="store_true",
                        help="Force calendar image generation even if status hasn't changed")
     
-    # Device transfer options (with config file defaults)
-    parser.add_argument("--device", 
-                       default=config_data.get('device', DEFAULT_DEVICE_ADDRESS),
+    # Device transfer options (config file values are merged in after parsing)
+    parser.add_argument("--device", default=argparse.SUPPRESS,
                        help=f"BLE device address (default from config or {DEFAULT_DEVICE_ADDRESS})")
-    parser.add_argument("--rotation", type=int, 
-                       default=config_data.get('rotation', DEFAULT_ROTATION),
+    parser.add_argument("--rotation", type=int, default=argparse.SUPPRESS,
                        help=f"Image rotation in degrees (default from config or {DEFAULT_ROTATION})")
-    parser.add_argument("--mirror-x", action="store_true", 
-                       default=config_data.get('mirror_x', DEFAULT_MIRROR_X),
+    parser.add_argument("--mirror-x", action="store_true", default=argparse.SUPPRESS,
                        help="Mirror image horizontally (default from config)")
-    parser.add_argument("--mirror-y", action="store_true", 
-                       default=config_data.get('mirror_y', DEFAULT_MIRROR_Y),
+    parser.add_argument("--mirror-y", action="store_true", default=argparse.SUPPRESS,
                        help="Mirror image vertically (default from config)")
-    parser.add_argument("--scan-timeout", type=int,
-                       default=config_data.get('scan_timeout', 10),
+    parser.add_argument("--scan-timeout", type=int, default=argparse.SUPPRESS,
                        help="BLE scan timeout in seconds (default from config or 10)")
-    parser.add_argument("--connection-timeout", type=int,
-                       default=config_data.get('connection_timeout', 30),
+    parser.add_argument("--connection-timeout", type=int, default=argparse.SUPPRESS,
                        help="BLE connection timeout in seconds (default from config or 30)")
-    parser.add_argument("--compression", action="store_true",
-                       default=config_data.get('compression', False),
+    parser.add_argument("--compression", action="store_true", default=argparse.SUPPRESS,
                        help="Use compression for image data (default from config)")
-    parser.add_argument("--no-red", action="store_true",
-                       default=config_data.get('no_red', False),
+    parser.add_argument("--no-red", action="store_true", default=argparse.SUPPRESS,
                        help="Disable red channel (default from config)")
     
-    # Control options (with config file defaults)
-    parser.add_argument("--freshness-threshold", type=int, 
-                       default=config_data.get('freshness_threshold', FRESHNESS_THRESHOLD_MINUTES),
+    # Control options (config file values are merged in after parsing)
+    parser.add_argument("--freshness-threshold", type=int, default=argparse.SUPPRESS,
                        help=f"Maximum age in minutes for image to be considered fresh (default from config or {FRESHNESS_THRESHOLD_MINUTES})")
     parser.add_argument("--force-send", action="store_true",
                        help="Send to device even if image is not fresh")
     parser.add_argument("--dry-run", action="store_true",
                        help="Generate image but don't send to device")
+    parser.add_argument("--daemon", action="store_true",
+                       help="Keep running: refresh the calendar every check window and send the image whenever it changes")
     parser.add_argument("--verbose", "-v", action="store_true",
                        help="Enable verbose logging")
     
-    # Parse arguments again with all options
+    # Parse the command line once; options left unset are filled from the config file below
     args = parser.parse_args()
     
+    # Handle config file creation
+    if args.create_config:
+        config_path = args.config
+        # TOML can't be read back without tomllib, so write the legacy INI example instead
+        if tomllib is None and config_path == DEFAULT_CONFIG_FILE:
+            config_path = LEGACY_CONFIG_FILE
+            logger.info(f"ℹ️  TOML config files need Python 3.11+, creating {config_path} instead")
+        elif tomllib is None and not config_path.endswith('.ini'):
+            logger.warning("⚠️ TOML config files need Python 3.11+; use an .ini path to get a readable config")
+        if create_example_config(config_path):
+            logger.info(f"✅ Example configuration file created: {config_path}")
+            logger.info("📝 Please edit the file with your calendar URL and device address")
+            return 0
+        else:
+            logger.error("❌ Failed to create configuration file")
+            return 1
+    
+    # Fall back to the legacy INI file when the default TOML file doesn't exist
+    if args.config == DEFAULT_CONFIG_FILE and not os.path.exists(DEFAULT_CONFIG_FILE) \
+            and os.path.exists(LEGACY_CONFIG_FILE):
+        args.config = LEGACY_CONFIG_FILE
+    
+    # Load configuration file
+    config_data = load_config_file(args.config)
+    
+    # Command line arguments override configuration file settings
+    for key, default in CONFIG_DEFAULTS.items():
+        if not hasattr(args, key):
+            setattr(args, key, config_data.get(key, default))
+    
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
-    # Handle mirror logic
-    mirror_x = args.mirror_x
-    
     logger.info("🏷️  CALENDAR TAG WRAPPER STARTING")
     logger.info("=" * 60)
     
@@ -359,131 +768,40 @@ Examples:
     else:
         logger.info(f"📋 No configuration file loaded (checked: {args.config})")
     
-    logger.info(f"📋 Final configuration:")
-    logger.info(f"   Tag size: {args.tag_size}\"")
-    logger.info(f"   Device: {args.device}")
-    logger.info(f"   Rotation: {args.rotation}°")
-    logger.info(f"   Mirror X: {mirror_x}")
-    logger.info(f"   Mirror Y: {args.mirror_y}")
-    logger.info(f"   BLE scan timeout: {args.scan_timeout}s")
-    logger.info(f"   BLE connection timeout: {args.connection_timeout}s")
-    logger.info(f"   Compression: {args.compression}")
-    logger.info(f"   No red channel: {args.no_red}")
-    logger.info(f"   Freshness threshold: {args.freshness_threshold} minutes")
-    logger.info(f"   Status file: {args.status_file}")
-    logger.info(f"   Force calendar update: {args.force_calendar_update}")
-    logger.info(f"   Dry run: {args.dry_run}")
-    if args.ics_url:
-        logger.info(f"   ICS URL: {args.ics_url[:50]}...")
-    else:
-        logger.info(f"   ICS URL: (not specified - will use outlook_cal_status.py default)")
-    
-    # Step 1: Generate calendar status image
-    logger.info("\n📅 STEP 1: GENERATING CALENDAR STATUS IMAGE")
-    logger.info("-" * 50)
-    
-    outlook_cmd = [
-        "python", "outlook_cal_status.py",
-        "--tag-size", args.tag_size,
-        "--check-window", str(args.check_window),
-        "--save-image", STATUS_IMAGE_PATH,
-        "--status-file", args.status_file
-    ]
-    
-    if args.ics_url:
-        outlook_cmd.extend(["--ics-url", args.ics_url])
-    
-    if args.force_calendar_update:
-        outlook_cmd.append("--force-update")
-    
-    if args.verbose:
-        outlook_cmd.append("--verbose")
-    
-    success = run_command(outlook_cmd, "Generating calendar status image")
-    
-    if not success:
-        logger.error("💥 Failed to generate calendar status image")
-        return 1
-    
-    # Check if image was actually generated (it might be skipped if status unchanged)
-    if not os.path.exists(STATUS_IMAGE_PATH):
-        logger.info("📄 No image generated (status unchanged)")
-        logger.info("💡 Calendar status hasn't changed, no update needed")
-        return 0
-    
-    # Step 2: Check if image is fresh
-    logger.info("\n⏰ STEP 2: CHECKING IMAGE FRESHNESS")
-    logger.info("-" * 50)
-    
-    is_fresh = check_file_freshness(STATUS_IMAGE_PATH, args.freshness_threshold)
-    
-    if not is_fresh and not args.force_send:
-        logger.warning("⚠️ Image is not fresh and --force-send not specified")
-        logger.info("💡 Use --force-send to send anyway, or check if calendar generation failed")
-        return 0
-    
-    if args.dry_run:
-        logger.info("🏃 DRY RUN: Would send image to device, but skipping due to --dry-run")
-        
-        # Build complete command string
-        cmd_preview = f"python gicisky_writer.py --device {args.device} --rotation {args.rotation}"
-        cmd_preview += f" --scan-timeout {args.scan_timeout} --connection-timeout {args.connection_timeout}"
-        
-        if mirror_x:
-            cmd_preview += " --mirror-x"
-        if args.mirror_y:
-            cmd_preview += " --mirror-y"
-        if args.compression:
-            cmd_preview += " --compression"
-        if args.no_red:
-            cmd_preview += " --no-red"
-            
-        cmd_preview += f" {STATUS_IMAGE_PATH}"
-        logger.info(f"   Would run: {cmd_preview}")
-        return 0
-    
-    # Step 3: Send to e-ink device
-    logger.info("\n📡 STEP 3: SENDING TO E-INK DEVICE")
-    logger.info("-" * 50)
-    
-    gicisky_cmd = [
-        "python", "gicisky_writer.py",
-        "--device", args.device,
-        "--rotation", str(args.rotation),
-        "--scan-timeout", str(args.scan_timeout),
-        "--connection-timeout", str(args.connection_timeout),
-        STATUS_IMAGE_PATH
-    ]
-    
-    if mirror_x:
-        gicisky_cmd.insert(-1, "--mirror-x")
-    
-    if args.mirror_y:
-        gicisky_cmd.insert(-1, "--mirror-y")
-    
-    if args.compression:
-        gicisky_cmd.insert(-1, "--compression")
-    
-    if args.no_red:
-        gicisky_cmd.insert(-1, "--no-red")
+    if logger.isEnabledFor(logging.INFO):
+        ics_url = f"{args.ics_url[:50]}..." if args.ics_url else "(not specified - will use outlook_cal_status.py default)"
+        logger.info(
+            "📋 Final configuration:\n"
+            "   Tag size: %s\"\n"
+            "   Device: %s\n"
+            "   Rotation: %s°\n"
+            "   Mirror X: %s\n"
+            "   Mirror Y: %s\n"
+            "   BLE scan timeout: %ss\n"
+            "   BLE connection timeout: %ss\n"
+            "   Compression: %s\n"
+            "   No red channel: %s\n"
+            "   Freshness threshold: %s minutes\n"
+            "   Status file: %s\n"
+            "   Force calendar update: %s\n"
+            "   Dry run: %s\n"
+            "   Daemon: %s\n"
+            "   ICS URL: %s",
+            args.tag_size, args.device, args.rotation, args.mirror_x, args.mirror_y,
+            args.scan_timeout, args.connection_timeout, args.compression, args.no_red,
+            args.freshness_threshold, args.status_file, args.force_calendar_update,
+            args.dry_run, args.daemon, ics_url,
+        )
     
-    success = run_command(gicisky_cmd, "Sending image to e-ink device")
+    if args.daemon:
+        return await run_daemon(args)
     
-    if success:
-        logger.info("\n🎉 WORKFLOW COMPLETED SUCCESSFULLY!")
-        logger.info("=" * 60)
-        logger.info("✅ Calendar status has been updated on your e-ink tag")
-        return 0
-    else:
-        logger.error("\n💥 WORKFLOW FAILED!")
-        logger.error("=" * 60)
-        logger.error("❌ Failed to send image to e-ink device")
-        return 1
+    return await run_workflow(args)
 
 
 if __name__ == "__main__":
     try:
-        exit_code = main()
+        exit_code = asyncio.run(main())
         sys.exit(exit_code)
     except KeyboardInterrupt:
         logger.info("\n⚠️ Workflow interrupted by user (Ctrl+C)")
@@ -8,20 +8,34 @@ This script allows you to connect to a Gicisky e-ink tag via Bluetooth Low Energ
 from __future__ import annotations
 
 # Standard library imports
+import argparse
 import asyncio
+import heapq
 import logging
+import random
 import re
 import struct
+import sys
 import traceback
-from asyncio import Event, wait_for, sleep
+import weakref
+from asyncio import wait_for, sleep
 from enum import Enum
+from importlib.metadata import PackageNotFoundError, version
 from typing import Any, Callable, TypeVar, Optional, List
 
 # Third-party imports
-from PIL import Image
+import numpy as np
+from PIL import Image, ImageChops
 from bleak import BleakClient, BleakError, BleakScanner
 from bleak.backends.device import BLEDevice
 
+try:
+    from bleak_retry_connector import BleakClientWithServiceCache, close_stale_connections, establish_connection
+except ImportError:  # optional, plain BleakClient.connect() is used without it
+    BleakClientWithServiceCache = None
+    close_stale_connections = None
+    establish_connection = None
+
 # Configure logging
 _LOGGER = logging.getLogger(__name__)
 # Ensure basic logging configuration if not already configured
@@ -31,7 +45,8 @@ if not logging.getLogger().handlers:
 # Device configuration class
 class DeviceConfig:
     def __init__(self, width=296, height=128, red=True, tft=False, rotation=0, 
-                 mirror_x=False, mirror_y=False, compression=False):
+                 mirror_x=False, mirror_y=False, compression=False, window=1, chunk_size=240,
+                 dither=False):
         self.width = width
         self.height = height
         self.red = red
@@ -40,6 +55,9 @@ class DeviceConfig:
         self.mirror_x = mirror_x
         self.mirror_y = mirror_y
         self.compression = compression
+        self.window = window
+        self.chunk_size = chunk_size
+        self.dither = dither
 
 # Exception definitions
 class BleakCharacteristicMissing(BleakError):
@@ -48,8 +66,38 @@ class BleakCharacteristicMissing(BleakError):
 class BleakServiceMissing(BleakError):
     """Service Missing"""
 
+# Connection attempts made by bleak-retry-connector before giving up
+CONNECT_MAX_ATTEMPTS = 4
+# Bytes of each ATT write taken by the ATT header (3) and the part index (4)
+IMAGE_PACKET_OVERHEAD = 7
+# Seconds to wait for the reply to the first command before resending it
+START_RESPONSE_TIMEOUT = 5.0
+# ATT MTU before any exchange; a client reporting this hasn't negotiated yet
+DEFAULT_ATT_MTU = 23
+# bleak releases [first, last) whose private backend internals the connection tuning after
+# connect is written against; on other releases it is skipped and bleak's defaults apply
+PRIVATE_BACKEND_BLEAK_VERSIONS = ((0, 19), (4, 0))
+
+# Expected response prefixes for the start, size and image commands
+_EXPECTED_START_ACK = b"\x01\xf4\x00"
+_EXPECTED_SIZE_ACK = b"\x02"
+_EXPECTED_IMG_ACK = b"\x05\x00"
+
+# Image part ack: 0x05, status (0x00 = more wanted), next part index (LE u32)
+_IMAGE_ACK = struct.Struct("<BBI")
+
+# A BLE address written as six hex pairs separated by ':' or '-'
+_MAC_RE = re.compile(r'^[0-9A-Fa-f]{2}([:-][0-9A-Fa-f]{2}){5}$')
+
+# WinRT connection parameter requests, kept alive for as long as their client
+_CONNECTION_PRIORITY_REQUESTS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
 WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
 
+def _backoff(attempt: int, base: float = 0.1, cap: float = 2.0, divisor: int = 4) -> float:
+    """Exponential retry delay for attempt (1-based), capped, minus up to 1/divisor jitter"""
+    return min(cap, base * (2 ** (attempt - 1))) * (1 - random.random() / divisor)
+
 def disconnect_on_missing_services(func: WrapFuncType) -> WrapFuncType:
     """Missing services"""
     async def wrapper(self, *args, **kwargs):
@@ -62,6 +110,104 @@ def disconnect_on_missing_services(func: WrapFuncType) -> WrapFuncType:
             raise
     return wrapper  # type: ignore
 
+async def write_image_with_client(
+    client: BleakClient,
+    device: DeviceConfig,
+    image: Image,
+    threshold: int = 128,
+    red_threshold: int = 128,
+    image_packets: bytes | None = None
+) -> bool:
+    """Write image (or its already encoded image_packets) over a connected client, leaving it open"""
+    # The command and image characteristics are the two lowest 16-bit UUIDs under the 0000fxxx services
+    sorted_uuids = heapq.nsmallest(
+        2,
+        (c.uuid for svc in client.services if svc.uuid[:5].lower() == "0000f" for c in svc.characteristics),
+        key=lambda uuid: int(uuid[4:8], 16),
+    )
+    if len(sorted_uuids) < 2:
+        raise BleakServiceMissing(f"UUID Len: {len(sorted_uuids)}")
+    
+    gicisky = GiciskyClient(client, sorted_uuids, device)
+    await gicisky.start_notify()
+    success = await gicisky.write_image(image, threshold, red_threshold, image_packets)
+    await gicisky.stop_notify()
+    return success
+
+def _bleak_version() -> tuple:
+    """Installed bleak version as (major, minor), or (0, 0) when it can't be determined"""
+    try:
+        return tuple(int(part) for part in re.findall(r"\d+", version("bleak"))[:2])
+    except (PackageNotFoundError, ValueError):
+        return (0, 0)
+
+def _private_backend(client: BleakClient, backend_name: str) -> Any:
+    """The client's backend if it is backend_name on a supported bleak release, else None"""
+    backend = getattr(client, "_backend", None)
+    first, last = PRIVATE_BACKEND_BLEAK_VERSIONS
+    if type(backend).__name__ != backend_name or not first <= _bleak_version() < last:
+        return None
+    return backend
+
+def request_high_connection_priority(client: BleakClient) -> bool:
+    """Best-effort request for a short connection interval; returns True if one was made"""
+    # bleak has no public API for connection parameters, so this goes through backend
+    # internals behind the same guard as acquire_mtu()
+    try:
+        # WinRT: the backend keeps the BluetoothLEDevice as _requester (Windows 11+)
+        requester = getattr(_private_backend(client, "BleakClientWinRT"), "_requester", None)
+        if requester is not None and hasattr(requester, "request_preferred_connection_parameters"):
+            from winrt.windows.devices.bluetooth import BluetoothLEPreferredConnectionParameters
+            # The returned request must stay alive or Windows reverts the parameters
+            _CONNECTION_PRIORITY_REQUESTS[client] = requester.request_preferred_connection_parameters(
+                BluetoothLEPreferredConnectionParameters.throughput_optimized
+            )
+            return True
+        # Android: BluetoothGatt.requestConnectionPriority(CONNECTION_PRIORITY_HIGH)
+        gatt = getattr(_private_backend(client, "BleakClientP4Android"), "_BleakClientP4Android__gatt", None)
+        if gatt is not None:
+            return bool(gatt.requestConnectionPriority(1))
+    except Exception as e:
+        _LOGGER.debug(f"Connection priority request failed: {e}")
+        return False
+    # BlueZ has no D-Bus API for connection parameters; the kernel picks the interval
+    _LOGGER.debug("No connection priority API on this BLE backend")
+    return False
+
+async def acquire_mtu(client: BleakClient) -> None:
+    """Make the negotiated MTU readable from client.mtu_size on BlueZ"""
+    # Other backends report the MTU directly; BlueZ always reports 23 until it is acquired
+    # through AcquireWrite/AcquireNotify. This is bleak's documented workaround (see its
+    # mtu_size.py example), which calls a private backend method
+    backend = _private_backend(client, "BleakClientBlueZDBus")
+    if backend is None:
+        return
+    try:
+        await backend._acquire_mtu()
+        _LOGGER.info(f"Negotiated MTU: {client.mtu_size}")
+    except Exception as e:
+        _LOGGER.debug(f"Could not acquire MTU: {e}")
+
+async def establish_tag_connection(
+    ble_device: BLEDevice,
+    disconnected_callback: Optional[Callable[[BleakClient], None]] = None
+) -> BleakClient:
+    """Connect to the tag, retrying transient failures when bleak-retry-connector is installed"""
+    if establish_connection is not None:
+        client = await establish_connection(
+            BleakClientWithServiceCache,
+            ble_device,
+            f"gicisky-{ble_device.address}",
+            disconnected_callback=disconnected_callback,
+            max_attempts=CONNECT_MAX_ATTEMPTS,
+        )
+    else:
+        client = BleakClient(ble_device, disconnected_callback=disconnected_callback)
+        await client.connect()
+    request_high_connection_priority(client)
+    await acquire_mtu(client)
+    return client
+
 async def update_image(
     ble_device: BLEDevice,
     device: DeviceConfig,
@@ -69,39 +215,168 @@ async def update_image(
     threshold: int = 128,
     red_threshold: int = 128
 ) -> bool:
-    """Update image on e-ink tag"""
-    client: BleakClient | None = None
+    """Update image on e-ink tag over a connection opened for this update"""
+    # Encode in a worker thread while the connection is being set up
+    encode_task = asyncio.ensure_future(
+        asyncio.to_thread(GiciskyEncoder(device).encode, image, threshold, red_threshold)
+    )
+    client = None
     try:
-        client = BleakClient(ble_device.address)
-        await client.connect()
-        
-        services = client.services
-        char_uuids = [
-            c.uuid
-            for svc in services if svc.uuid.lower().startswith("0000f")
-            for c in svc.characteristics
-        ]
-        if len(char_uuids) < 2:
-            raise BleakServiceMissing(f"UUID Len: {len(char_uuids)}")
-        
-        sorted_uuids = sorted(char_uuids, key=lambda x: int(x[4:8], 16))
-        gicisky = GiciskyClient(client, sorted_uuids, device)
-        await gicisky.start_notify()
-        success = await gicisky.write_image(image, threshold, red_threshold)
-        await gicisky.stop_notify()
-        return success
+        if close_stale_connections is not None:
+            await close_stale_connections(ble_device)
+        client = await establish_tag_connection(ble_device)
+        image_packets = await encode_task
+        return await write_image_with_client(client, device, image, threshold, red_threshold, image_packets)
     except Exception as e:
         _LOGGER.error(f"Fail update: {e}")
         _LOGGER.error(traceback.format_exc())
         return False
     finally:
-        if client:
+        if not encode_task.done():
+            encode_task.cancel()
+        elif not encode_task.cancelled():
+            # Retrieve an encode error the connection failure kept us from awaiting
+            encode_task.exception()
+        # Callers that keep a connection use connect_to_tag and write_image_with_client
+        if client is not None:
             try:
                 if client.is_connected:
                     await client.disconnect()
             except Exception as e:
                 _LOGGER.warning(f"{ble_device.address} Already disconnected: {e}")
 
+# Rec.709 luminance weights (0.2126, 0.7152, 0.0722) times 10000
+_LUMA_R, _LUMA_G, _LUMA_B = np.uint32(2126), np.uint32(7152), np.uint32(722)
+
+# Right-angle rotations are plain pixel transposes (counter-clockwise, like Image.rotate)
+_ROTATION_TRANSPOSE = {
+    90: Image.ROTATE_90,
+    180: Image.ROTATE_180,
+    270: Image.ROTATE_270,
+}
+
+class GiciskyEncoder:
+    """Image to packet data conversion; needs only the DeviceConfig, not a connection"""
+
+    def __init__(self, device: DeviceConfig) -> None:
+        self.width = device.width
+        self.height = device.height
+        self.support_red = device.red
+        self.tft = device.tft
+        self.rotation = device.rotation
+        self.mirror_x = device.mirror_x
+        self.mirror_y = device.mirror_y
+        self.compression = device.compression
+        self.dither = device.dither
+        # The config is fixed, so resolve its per-frame branches once
+        self._transpose = _ROTATION_TRANSPOSE.get(self.rotation % 360)
+        self._rotate = self._transpose is None and self.rotation % 360 != 0
+        self._bw_compare = np.less if self.compression else np.greater
+        # One (rows, columns) index applying both mirrors; a plain view when neither is set
+        self._mirror = (
+            slice(None, None, -1 if self.mirror_y else 1),
+            slice(None, None, -1 if self.mirror_x else 1),
+        )
+        self._pack_red = self.support_red or self.compression
+
+    def _overlay_images(
+        self,
+        base: Image,
+        overlay: Image,
+        position: tuple[int, int] = (0, 0),
+        center: bool = False
+    ) -> Image:
+        """Paste overlay onto base, which is modified in place when it is already RGB"""
+        base_rgb = base if base.mode == 'RGB' else base.convert('RGB')
+
+        w_base, h_base = base_rgb.size
+
+        ov = overlay if overlay.mode == 'RGB' else overlay.convert('RGB')
+        if ov.width > w_base or ov.height > h_base:
+            ov = ov.crop((0, 0, w_base, h_base))
+
+        if center:
+            x = (w_base - ov.width) // 2
+            y = (h_base - ov.height) // 2
+            position = (x, y)
+
+        base_rgb.paste(ov, position)
+
+        return base_rgb
+
+    def encode(self, image: Image, threshold: int, red_threshold: int) -> bytes:
+        """Convert image into the packet data the tag expects"""
+        if image.size == (self.width, self.height):
+            # Nothing to pad; later steps never modify img in place. A full-size paste
+            # would only convert the mode, alpha dropped, so convert directly
+            img = image if image.mode == 'RGB' else image.convert('RGB')
+        else:
+            img = Image.new('RGB', (self.width, self.height), color='white')
+            img = self._overlay_images(img, image)
+        width, height = img.size
+        
+        if self.tft:
+            img = img.resize((width // 2, height * 2), resample=Image.BILINEAR)
+
+        if self._transpose is not None:
+            img = img.transpose(self._transpose)
+        elif self._rotate:
+            img = img.rotate(self.rotation, expand=True)
+
+        if self.dither:
+            white_mask, red_mask = self._dither_masks(img)
+            bw_mask = ~white_mask if self.compression else white_mask
+        else:
+            pixels = np.asarray(img)
+            r = pixels[..., 0]
+            g = pixels[..., 1]
+            # Rec.709 luminance scaled by 10000 so it is exact in integers. dtype= forces
+            # uint32 products; NumPy 1.x would otherwise pick uint16 from the scalar's value
+            luminance = np.multiply(r, _LUMA_R, dtype=np.uint32)
+            term = np.multiply(g, _LUMA_G, dtype=np.uint32)
+            luminance += term
+            luminance += np.multiply(pixels[..., 2], _LUMA_B, out=term, dtype=np.uint32)
+            bw_mask = self._bw_compare(luminance, threshold * 10000)
+            red_mask = (r > red_threshold) & (g < red_threshold)
+
+        bw_mask = bw_mask[self._mirror]
+        red_mask = red_mask[self._mirror]
+
+        # Bits run on across rows, so pack the flattened masks (last byte zero-padded)
+        if not self._pack_red:
+            return np.packbits(bw_mask.ravel()).tobytes()
+
+        # Both planes in one packbits pass; each row is padded on its own
+        packed = np.packbits(np.stack([bw_mask.ravel(), red_mask.ravel()]), axis=1)
+
+        if self.compression:
+            return self._compress_byte_data(packed[0].tobytes(), packed[1].tobytes())
+
+        return packed.tobytes()
+
+    def _dither_masks(self, img: Image) -> tuple[np.ndarray, np.ndarray]:
+        """Floyd-Steinberg dither img into (white, red) pixel masks"""
+        white = img.convert('L').convert('1', dither=Image.FLOYDSTEINBERG)
+        # How much redder than green each pixel is, dithered on its own plane
+        r, g, _ = img.split()
+        red = ImageChops.subtract(r, g).convert('1', dither=Image.FLOYDSTEINBERG)
+        return np.asarray(white), np.asarray(red)
+
+    def _compress_byte_data(self, byte_data, byte_data_red) -> bytes:
+        byte_per_line = self.height // 8
+        line_header = np.array([0x75, byte_per_line + 7, byte_per_line, 0, 0, 0, 0], dtype=np.uint8)
+        headers = np.broadcast_to(line_header, (self.width, line_header.size))
+        blocks = []
+        for plane in (byte_data,) if byte_data_red is None else (byte_data, byte_data_red):
+            # One row per column line; a short plane leaves its missing bytes zero
+            lines = np.zeros((self.width, byte_per_line), dtype=np.uint8)
+            data = np.frombuffer(plane, dtype=np.uint8)[:lines.size]
+            lines.reshape(-1)[:data.size] = data
+            blocks.append(np.concatenate([headers, lines], axis=1))
+        body = np.concatenate(blocks).tobytes()
+
+        return struct.pack("<I", 4 + len(body)) + body
+
 class GiciskyClient:
     class Status(Enum):
         START = 0
@@ -117,65 +392,97 @@ class GiciskyClient:
     ) -> None:
         self.client = client
         self.cmd_uuid, self.img_uuid = uuids[:2]
-        self.width = device.width
-        self.height = device.height
-        self.support_red = device.red
-        self.tft = device.tft
-        self.rotation = device.rotation
-        self.mirror_x = device.mirror_x
-        self.mirror_y = device.mirror_y
-        self.compression = device.compression
+        self.encoder = GiciskyEncoder(device)
+        self.window = max(1, device.window)
+        self.mtu = getattr(client, "mtu_size", DEFAULT_ATT_MTU) or DEFAULT_ATT_MTU
+        self.chunk_size = self._negotiated_chunk_size(device.chunk_size)
+        # Image data skips the link-layer write response when the characteristic allows it and
+        # a whole part fits in one packet; the tag acks every part by notification anyway
+        self.img_write_response = (
+            not self._supports_write_without_response(self.img_uuid)
+            or self.chunk_size + 4 > self.mtu - 3
+        )
+        self.cmd_write_response = self._command_write_response()
         self.packet_size = 0
-        self.event: Event = Event()
-        self.command_data: bytes | None = None
-        self.image_packets: list[int] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._notif_queue: asyncio.Queue[bytes] = asyncio.Queue()
+        # Encoded packet data (bytes); parts are sliced from a memoryview of it while sending
+        self.image_packets: bytes = b""
+        self._packets_mv = memoryview(self.image_packets)
+        self._image_parts: list[bytes] = []
+        self._ack_futures: dict[int, asyncio.Future] = {}
+        self._transfer_ended = False
 
     @disconnect_on_missing_services
     async def start_notify(self) -> None:
+        self._loop = asyncio.get_running_loop()
         await self.client.start_notify(self.cmd_uuid, self._notification_handler)
-        await sleep(1.0)
 
     @disconnect_on_missing_services
     async def stop_notify(self) -> None:
         await self.client.stop_notify(self.cmd_uuid)
 
     @disconnect_on_missing_services
-    async def write(self, uuid: str, data: bytes) -> None:
+    async def write(self, uuid: str, data: bytes, response: Optional[bool] = None) -> None:
         _LOGGER.debug("Write UUID=%s data=%s", uuid, len(data))
-        chunk = len(data)
-        for i in range(0, len(data), chunk):
-            await self.client.write_gatt_char(uuid, data[i : i + chunk])
+        if not response and len(data) > self.mtu - 3:
+            # A write without response is a single ATT packet; only acknowledged writes can
+            # be split into long (prepared) writes by the stack
+            response = True
+        await self.client.write_gatt_char(uuid, data, response=response)
 
     def _notification_handler(self, _: Any, data: bytearray) -> None:
-        if self.command_data == None:
-            self.command_data = bytes(data)
-            self.event.set()
+        # May run on the BLE backend's thread; hand the data to the event loop and return
+        self._loop.call_soon_threadsafe(self._notif_queue.put_nowait, bytes(data))
+
+    def _drain_notifications(self) -> None:
+        while not self._notif_queue.empty():
+            _LOGGER.debug("Dropping stale notification: %s", self._notif_queue.get_nowait().hex())
+
+    def _resolve_image_ack(self, data: bytes) -> None:
+        if len(data) >= 6:
+            kind, status, next_part = _IMAGE_ACK.unpack_from(data)
+            if kind == 0x05 and status == 0x00:
+                # The tag acks a part by asking for the next one
+                ack = self._ack_futures.pop(next_part, None)
+                if ack is None:
+                    _LOGGER.warning("Unexpected image ack: %s", data.hex())
+                elif not ack.done():
+                    ack.set_result(data)
+                return
+
+        # Anything else ends the transfer on the tag side
+        self._transfer_ended = True
+        for ack in self._ack_futures.values():
+            if not ack.done():
+                ack.set_result(data)
+        self._ack_futures.clear()
 
     async def read(self, timeout: float = 30.0) -> bytes:
-        await wait_for(self.event.wait(), timeout)
-        data = self.command_data or b""
+        data = await wait_for(self._notif_queue.get(), timeout)
         _LOGGER.debug("Received: %s", data.hex())
         return data
 
-    async def write_with_response(self, uuid, packet: bytes) -> bytes:
+    async def write_with_response(self, uuid, packet: bytes, timeout: float = 30.0) -> bytes:
+        response = self.img_write_response if uuid == self.img_uuid else self.cmd_write_response
         last_exception = None
-        max_retries = 3
+        max_retries = 5
         for attempt in range(1, max_retries + 1):
             try:
-                self.command_data = None
-                self.event.clear()
-                await self.write(uuid, packet)
-                return await self.read()
+                self._drain_notifications()
+                await self.write(uuid, packet, response)
+                return await self.read(timeout)
             except Exception as e:
                 last_exception = e
                 if attempt < max_retries:
                     _LOGGER.warning(f"Write retry (attempt {attempt}/{max_retries})")
-                    await sleep(0.5)
+                    await sleep(_backoff(attempt))
                     continue
                 raise last_exception
 
     async def write_start_with_response(self) -> bytes:
-        return await self.write_with_response(self.cmd_uuid, self._make_cmd_packet(0x01))
+        # The first command may race notification setup on the tag, so retry it quickly
+        return await self.write_with_response(self.cmd_uuid, self._make_cmd_packet(0x01), START_RESPONSE_TIMEOUT)
 
     async def write_size_with_response(self) -> bytes:
         return await self.write_with_response(self.cmd_uuid, self._make_cmd_packet(0x02))
@@ -184,39 +491,52 @@ class GiciskyClient:
         return await self.write_with_response(self.cmd_uuid, self._make_cmd_packet(0x03))
 
     async def write_image_with_response(self, part: int) -> bytes:
-        return await self.write_with_response(self.img_uuid, self._make_size_packet(part))
+        return await self.write_with_response(self.img_uuid, self._image_part(part))
     
-    async def write_image(self, image: Image, threshold: int, red_threshold: int) -> bool:
+    async def write_image(self, image: Image, threshold: int, red_threshold: int,
+                          image_packets: bytes | None = None) -> bool:
         part = 0
         count = 0
         status = self.Status.START
-        self.image_packets = self._make_image_packet(image, threshold, red_threshold)
+        if image_packets is None:
+            image_packets = self.encoder.encode(image, threshold, red_threshold)
+        self.image_packets = image_packets
         self.packet_size = len(self.image_packets)
+        self._packets_mv = memoryview(self.image_packets)
+        # Build every part up front so the ack loop only sends
+        part_count = (self.packet_size + self.chunk_size - 1) // self.chunk_size
+        self._image_parts = [self._make_size_packet(part) for part in range(part_count)]
         try:
             while True:
                 if status == self.Status.START:
                     data = await self.write_start_with_response()
-                    if len(data) < 3 or data[0] != 0x01 or data[1] != 0xF4 or data[2] != 0x00:
+                    if data[:3] != _EXPECTED_START_ACK:
                         raise Exception(f"Packet Error: {data}")
                     status = self.Status.SIZE_DATA
                 
                 elif status == self.Status.SIZE_DATA:  
                     data = await self.write_size_with_response()
-                    if len(data) < 1 or data[0] != 0x02:
+                    if data[:1] != _EXPECTED_SIZE_ACK:
                         raise Exception(f"Packet Error: {data}")
                     status = self.Status.IMAGE
 
                 elif status == self.Status.IMAGE:  
                     data = await self.write_start_image_with_response()
-                    if len(data) < 6 or data[0] != 0x05 or data[1] != 0x00:
+                    if len(data) < 6 or data[:2] != _EXPECTED_IMG_ACK:
                         raise Exception(f"Packet Error: {data}")
                     status = self.Status.IMAGE_DATA
 
+                elif status == self.Status.IMAGE_DATA and self.window > 1:
+                    await self._write_image_pipelined()
+                    break
+
                 elif status == self.Status.IMAGE_DATA:  
                     data = await self.write_image_with_response(part)
-                    if len(data) < 6 or data[0] != 0x05 or data[1] != 0x00:
+                    if len(data) < 6:
+                        break
+                    kind, ack_status, part = _IMAGE_ACK.unpack_from(data)
+                    if kind != 0x05 or ack_status != 0x00:
                         break
-                    part = int.from_bytes(data[2:6], "little")
                     count += 1
                     if part != count:
                         raise Exception(f"Count Error: {part} {count}")
@@ -229,121 +549,68 @@ class GiciskyClient:
         finally:
             _LOGGER.debug("Finish")
 
-    def _overlay_images(
-        self,
-        base: Image,
-        overlay: Image,
-        position: tuple[int, int] = (0, 0),
-        center: bool = False
-    ) -> Image:
-        if base.mode != 'RGB':
-            base_rgb = base.convert('RGB')
-        else:
-            base_rgb = base.copy()
-
-        w_base, h_base = base_rgb.size
+    async def _write_image_pipelined(self, timeout: float = 30.0) -> None:
+        """Send all image parts, keeping up to self.window of them awaiting their ack"""
+        loop = asyncio.get_running_loop()
+        part_count = len(self._image_parts)
+        window = asyncio.Semaphore(self.window)
+        write_lock = asyncio.Lock()
+        self._transfer_ended = False
+        self._ack_futures = {}
+        self._drain_notifications()
 
-        ov = overlay.convert('RGB')
-        if ov.width > w_base or ov.height > h_base:
-            ov = ov.crop((0, 0, w_base, h_base))
-
-        if center:
-            x = (w_base - ov.width) // 2
-            y = (h_base - ov.height) // 2
-            position = (x, y)
-
-        base_rgb.paste(ov, position)
+        async def route_acks() -> None:
+            while True:
+                self._resolve_image_ack(await self._notif_queue.get())
 
-        return base_rgb
+        async def send_part(part: int) -> None:
+            async with window:
+                if self._transfer_ended:
+                    return
+                ack = loop.create_future()
+                self._ack_futures[part + 1] = ack
+                async with write_lock:
+                    await self.write(self.img_uuid, self._image_parts[part], self.img_write_response)
+                await wait_for(ack, timeout)
 
-    def _make_image_packet(self, image: Image, threshold: int, red_threshold: int) -> list[int]:
-        img = Image.new('RGB', (self.width, self.height), color='white')
-        img = self._overlay_images(img, image)
-        tft = self.tft
-        rotation = self.rotation
-        width, height = img.size
-        
-        if tft:
-            img = img.resize((width // 2, height * 2), resample=Image.BICUBIC)
-
-        if rotation != 0:
-            img = img.rotate(rotation, expand=True)
+        router = asyncio.ensure_future(route_acks())
+        tasks = [asyncio.ensure_future(send_part(part)) for part in range(part_count)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            router.cancel()
+            for task in tasks:
+                task.cancel()
+            self._ack_futures = {}
 
-        width, height = img.size
-        pixels = img.load()
-
-        byte_data = []
-        byte_data_red = []
-        current_byte = 0
-        current_byte_red = 0
-        bit_pos = 7
-
-        for y in range(height - 1, -1, -1) if self.mirror_y else range(height):
-            for x in range(width - 1, -1, -1) if self.mirror_x else range(width):
-                px = (x, y)
-                r, g, b = pixels[px]
-
-                luminance = 0.2126 * r + 0.7152 * g + 0.0722 * b
-                if self.compression:
-                    if luminance < threshold:
-                        current_byte |= (1 << bit_pos)
-                else:
-                    if luminance > threshold:
-                        current_byte |= (1 << bit_pos)
-                if (r > red_threshold) and (g < red_threshold):
-                    current_byte_red |= (1 << bit_pos)
-
-                bit_pos -= 1
-                if bit_pos < 0:
-                    byte_data.append(current_byte)
-                    byte_data_red.append(current_byte_red)
-                    current_byte = 0
-                    current_byte_red = 0
-                    bit_pos = 7
-
-        if bit_pos != 7:
-            byte_data.append(current_byte)
-            byte_data_red.append(current_byte_red)
+    def _supports_write_without_response(self, uuid: str) -> bool:
+        services = getattr(self.client, "services", None)
+        char = services.get_characteristic(uuid) if services is not None else None
+        return char is not None and "write-without-response" in char.properties
 
-        if self.compression:
-            return self._compress_byte_data(byte_data, byte_data_red)
-        
-        combined = byte_data + byte_data_red if self.support_red else byte_data
-        return list(bytearray(combined))
+    def _command_write_response(self) -> Optional[bool]:
+        """Write type for commands: acknowledged if the characteristic allows it, else bleak's choice"""
+        services = getattr(self.client, "services", None)
+        char = services.get_characteristic(self.cmd_uuid) if services is not None else None
+        if char is None:
+            return None
+        if "write" in char.properties:
+            return True
+        if "write-without-response" in char.properties:
+            return False
+        return None
 
-    def _compress_byte_data(self, byte_data, byte_data_red) -> list[int]:
-        byte_per_line = self.height // 8
-        buf = [0x00, 0x00, 0x00, 0x00]
-        pos = 0
-        for _ in range(self.width):
-            buf.extend([
-                0x75,
-                byte_per_line + 7,
-                byte_per_line,
-                0x00, 0x00, 0x00, 0x00
-            ])
-            buf.extend(byte_data[pos:pos + byte_per_line])
-            pos += byte_per_line
-
-        if byte_data_red is not None:
-            pos = 0
-            for _ in range(self.width):
-                buf.extend([
-                    0x75,
-                    byte_per_line + 7,
-                    byte_per_line,
-                    0x00, 0x00, 0x00, 0x00
-                ])
-                buf.extend(byte_data_red[pos:pos + byte_per_line])
-                pos += byte_per_line
-
-        total_len = len(buf)
-        buf[0] =  total_len        & 0xFF
-        buf[1] = (total_len >>  8) & 0xFF
-        buf[2] = (total_len >> 16) & 0xFF
-        buf[3] = (total_len >> 24) & 0xFF
-
-        return list(bytearray(buf))
+    def _negotiated_chunk_size(self, chunk_size: int) -> int:
+        """Cap chunk_size to what fits in one write at the negotiated MTU"""
+        mtu = self.mtu
+        if mtu <= DEFAULT_ATT_MTU:
+            # Not negotiated (or not reported); write() sends anything bigger than one
+            # packet with response so the stack can use long writes
+            return chunk_size
+        if mtu - IMAGE_PACKET_OVERHEAD < chunk_size:
+            _LOGGER.info(f"MTU {mtu} limits image chunks to {mtu - IMAGE_PACKET_OVERHEAD} bytes")
+            return mtu - IMAGE_PACKET_OVERHEAD
+        return chunk_size
 
     def _make_cmd_packet(self, cmd: int) -> bytes:
         if cmd == 0x02:
@@ -354,31 +621,37 @@ class GiciskyClient:
             return bytes(packet)
         return bytes([cmd])
 
+    def _image_part(self, part: int) -> bytes:
+        if part < len(self._image_parts):
+            return self._image_parts[part]
+        # The tag asked past the end; send the (empty) part it asked for, as before
+        return self._make_size_packet(part)
+
     def _make_size_packet(self, part: int) -> bytes:
-        start = part * 240
-        chunk = self.image_packets[start : start + min(240, self.packet_size - start)]
-        packet = bytearray(4 + len(chunk))
-        struct.pack_into("<I", packet, 0, part)
-        packet[4:] = bytes(chunk)
-        return bytes(packet)
+        start = part * self.chunk_size
+        # Slicing the view is zero-copy; the concatenation is the only copy of the data
+        chunk = self._packets_mv[start : start + min(self.chunk_size, self.packet_size - start)]
+        return struct.pack("<I", part) + chunk
 
 
 # BLE Device Discovery and Scanning Functions
 
-async def scan_for_devices(timeout: int = 10, name_filter: str = None) -> List[BLEDevice]:
+async def scan_for_devices(timeout: int = 10, name_filter: str = None,
+                           devices: Optional[List[BLEDevice]] = None) -> List[BLEDevice]:
     """
     Scan for BLE devices with optional name filtering.
     
     Args:
         timeout: Scan timeout in seconds
         name_filter: Optional filter for device names (case-insensitive)
+        devices: Results of an earlier scan to filter instead of scanning again
     
     Returns:
         List of discovered BLE devices
     """
-    _LOGGER.info(f"Scanning for BLE devices (timeout: {timeout}s)...")
-    
-    devices = await BleakScanner.discover(timeout=timeout, return_adv=False)
+    if devices is None:
+        _LOGGER.info(f"Scanning for BLE devices (timeout: {timeout}s)...")
+        devices = await BleakScanner.discover(timeout=timeout, return_adv=False)
     
     if name_filter:
         filtered_devices = []
@@ -394,13 +667,15 @@ async def scan_for_devices(timeout: int = 10, name_filter: str = None) -> List[B
     return devices
 
 
-async def find_device_by_address(address: str, timeout: int = 10) -> Optional[BLEDevice]:
+async def find_device_by_address(address: str, timeout: int = 10,
+                                 devices: Optional[List[BLEDevice]] = None) -> Optional[BLEDevice]:
     """
     Find a specific device by its BLE address.
     
     Args:
         address: BLE device address (MAC address format)
         timeout: Scan timeout in seconds
+        devices: Results of an earlier scan to search instead of scanning again
     
     Returns:
         BLEDevice if found, None otherwise
@@ -410,7 +685,7 @@ async def find_device_by_address(address: str, timeout: int = 10) -> Optional[BL
     # Normalize address format (handle different separators)
     normalized_address = address.upper().replace('-', ':').replace('_', ':')
     
-    devices = await scan_for_devices(timeout=timeout)
+    devices = await scan_for_devices(timeout=timeout, devices=devices)
     
     for device in devices:
         device_addr = device.address.upper().replace('-', ':').replace('_', ':')
@@ -422,12 +697,14 @@ async def find_device_by_address(address: str, timeout: int = 10) -> Optional[BL
     return None
 
 
-async def find_gicisky_devices(timeout: int = 10) -> List[BLEDevice]:
+async def find_gicisky_devices(timeout: int = 10,
+                              devices: Optional[List[BLEDevice]] = None) -> List[BLEDevice]:
     """
     Find devices that are likely Gicisky e-ink tags.
     
     Args:
         timeout: Scan timeout in seconds
+        devices: Results of an earlier scan to search instead of scanning again
     
     Returns:
         List of potential Gicisky devices
@@ -443,7 +720,7 @@ async def find_gicisky_devices(timeout: int = 10) -> List[BLEDevice]:
         "TAG"
     ]
     
-    all_devices = await scan_for_devices(timeout=timeout)
+    all_devices = await scan_for_devices(timeout=timeout, devices=devices)
     gicisky_devices = []
     
     for device in all_devices:
@@ -556,49 +833,40 @@ async def smart_device_discovery(device_address: str, scan_timeout: int = 10,
     Returns:
         BLEDevice if found, None otherwise
     """
-    start_time = asyncio.get_running_loop().time()
-    
     _LOGGER.info(f"Smart discovery for device: {device_address}")
     _LOGGER.info(f"Scan timeout: {scan_timeout}s, Total timeout: {connection_timeout}s")
     
+    # Scan once; every method below filters the same results
+    devices = await scan_for_devices(timeout=min(scan_timeout, connection_timeout))
+    
     # Method 1: Direct address lookup
-    if re.match(r'^[0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}$', device_address):
+    if _MAC_RE.match(device_address):
         _LOGGER.info("Method 1: Direct address lookup...")
-        device = await find_device_by_address(device_address, scan_timeout)
+        device = await find_device_by_address(device_address, devices=devices)
         if device:
             return device
     
-    # Check if we have time for more methods
-    elapsed = asyncio.get_running_loop().time() - start_time
-    if elapsed >= connection_timeout:
-        _LOGGER.warning("Timeout reached during direct lookup")
-        return None
-    
     # Method 2: Name pattern matching
     _LOGGER.info("Method 2: Name pattern matching...")
-    remaining_time = max(5, connection_timeout - elapsed)
-    devices = await scan_for_devices(timeout=min(scan_timeout, remaining_time), name_filter=device_address)
+    matches = await scan_for_devices(name_filter=device_address, devices=devices)
     
-    if devices:
-        if len(devices) == 1:
-            _LOGGER.info(f"Found unique match: {devices[0].name} ({devices[0].address})")
-            return devices[0]
+    if matches:
+        if len(matches) == 1:
+            _LOGGER.info(f"Found unique match: {matches[0].name} ({matches[0].address})")
+            return matches[0]
         else:
-            _LOGGER.warning(f"Found {len(devices)} devices matching '{device_address}':")
-            for device in devices:
+            _LOGGER.warning(f"Found {len(matches)} devices matching '{device_address}':")
+            for device in matches:
                 _LOGGER.warning(f"   - {device.name} ({device.address})")
-            return devices[0]  # Return first match
+            return matches[0]  # Return first match
     
     # Method 3: Find any Gicisky devices if no specific match
-    elapsed = asyncio.get_running_loop().time() - start_time
-    if elapsed < connection_timeout:
-        _LOGGER.info("Method 3: Looking for any Gicisky devices...")
-        remaining_time = max(5, connection_timeout - elapsed)
-        gicisky_devices = await find_gicisky_devices(timeout=min(scan_timeout, remaining_time))
-        
-        if gicisky_devices:
-            _LOGGER.warning(f"Target device not found, but found {len(gicisky_devices)} Gicisky device(s)")
-            return gicisky_devices[0]  # Return first Gicisky device
+    _LOGGER.info("Method 3: Looking for any Gicisky devices...")
+    gicisky_devices = await find_gicisky_devices(devices=devices)
+    
+    if gicisky_devices:
+        _LOGGER.warning(f"Target device not found, but found {len(gicisky_devices)} Gicisky device(s)")
+        return gicisky_devices[0]  # Return first Gicisky device
     
     _LOGGER.error(f"Device discovery failed for: {device_address}")
     return None
@@ -658,6 +926,36 @@ async def write_image_to_tag(device_address: str, image_path: str,
     return await update_image(ble_device, device_config, image, threshold, red_threshold)
 
 
+async def connect_to_tag(device_address: str, scan_timeout: int = 10, connection_timeout: int = 30,
+                         disconnected_callback: Optional[Callable[[BleakClient], None]] = None) -> Optional[BleakClient]:
+    """
+    Discover a tag and open a connection that the caller keeps for repeated writes.
+    
+    Args:
+        device_address: BLE device address or name pattern
+        scan_timeout: BLE scan timeout in seconds
+        connection_timeout: Total timeout for discovery process
+        disconnected_callback: Called with the client when the tag drops the connection
+    
+    Returns:
+        Connected BleakClient, or None if the device was not found or the connection failed
+    """
+    ble_device = await smart_device_discovery(device_address, scan_timeout, connection_timeout)
+    
+    if not ble_device:
+        _LOGGER.error(f"Could not find device: {device_address}")
+        return None
+    
+    try:
+        client = await establish_tag_connection(ble_device, disconnected_callback)
+    except Exception as e:
+        _LOGGER.error(f"Connection failed: {e}")
+        return None
+    
+    _LOGGER.info(f"Connected to {ble_device.name or 'Unknown'} ({ble_device.address})")
+    return client
+
+
 async def test_device_connection(device_address: str, scan_timeout: int = 10, 
                                connection_timeout: int = 30) -> bool:
     """
@@ -715,90 +1013,99 @@ async def test_device_connection(device_address: str, scan_timeout: int = 10,
             _LOGGER.info("Disconnected")
 
 
-if __name__ == "__main__":
-    import asyncio
-    import argparse
-    
-    async def main():
-        parser = argparse.ArgumentParser(description="Write image to Gicisky e-ink tag")
-        parser.add_argument("image", nargs='?', help="Path to image file")
-        parser.add_argument("--device", help="BLE device address")
-        parser.add_argument("--threshold", type=int, default=128, help="Black/white threshold (0-255)")
-        parser.add_argument("--red-threshold", type=int, default=128, help="Red threshold (0-255)")
-        parser.add_argument("--width", type=int, default=296, help="Display width")
-        parser.add_argument("--height", type=int, default=128, help="Display height")
-        parser.add_argument("--rotation", type=int, default=0, help="Rotation in degrees")
-        parser.add_argument("--mirror-x", action="store_true", help="Mirror X axis")
-        parser.add_argument("--mirror-y", action="store_true", help="Mirror Y axis")
-        parser.add_argument("--compression", action="store_true", help="Use compression")
-        parser.add_argument("--no-red", action="store_true", help="Disable red channel")
-        parser.add_argument("--scan-timeout", type=int, default=10, help="BLE scan timeout in seconds")
-        parser.add_argument("--connection-timeout", type=int, default=30, help="BLE connection timeout in seconds")
-        parser.add_argument("--scan-devices", action="store_true", help="Scan for all BLE devices and exit")
-        parser.add_argument("--find-gicisky", action="store_true", help="Find Gicisky-like devices and exit")
-        parser.add_argument("--interactive", action="store_true", help="Interactive device selection")
-        parser.add_argument("--test-connection", help="Test connection to specific device address/name")
-        
-        args = parser.parse_args()
-        
-        # Handle scanning-only commands
-        if args.scan_devices:
-            _LOGGER.info("Scanning for all BLE devices...")
-            devices = await scan_for_devices(timeout=args.scan_timeout)
-            if devices:
-                print(f"\n📱 Found {len(devices)} devices:")
-                for i, device in enumerate(devices, 1):
-                    print(f"   {i}. {device.name or 'Unknown'} ({device.address})")
-            else:
-                print("❌ No devices found")
-            return
-        
-        if args.find_gicisky:
-            devices = await find_gicisky_devices(timeout=args.scan_timeout)
-            return
-        
-        if args.interactive:
-            device = await interactive_device_selection(timeout=args.scan_timeout)
-            if device:
-                print(f"\n✅ Selected device: {device.name or 'Unknown'} ({device.address})")
-            return
-        
-        if args.test_connection:
-            success = await test_device_connection(args.test_connection, args.scan_timeout, args.connection_timeout)
-            if success:
-                print("\n✅ Device connection test PASSED")
-            else:
-                print("\n❌ Device connection test FAILED")
-            return
-        
-        # Validate required arguments for image writing
-        if not args.image or not args.device:
-            parser.error("image and --device are required when not using scan-only commands")
-        
-        # Create device config
-        device_config = DeviceConfig(
-            width=args.width,
-            height=args.height,
-            red=not args.no_red,
-            rotation=args.rotation,
-            mirror_x=args.mirror_x,
-            mirror_y=args.mirror_y,
-            compression=args.compression
-        )
-        
-        success = await write_image_to_tag(
-            args.device, 
-            args.image,
-            args.threshold,
-            args.red_threshold,
-            device_config,
-            args.scan_timeout,
-            args.connection_timeout
-        )
-        
-        if success:
-            _LOGGER.info("Image written successfully!")
+async def main(argv=None) -> int:
+    """Command line entry point; returns a process exit code."""
+    parser = argparse.ArgumentParser(description="Write image to Gicisky e-ink tag")
+    parser.add_argument("image", nargs='?', help="Path to image file")
+    parser.add_argument("--device", help="BLE device address")
+    parser.add_argument("--threshold", type=int, default=128, help="Black/white threshold (0-255)")
+    parser.add_argument("--red-threshold", type=int, default=128, help="Red threshold (0-255)")
+    parser.add_argument("--width", type=int, default=296, help="Display width")
+    parser.add_argument("--height", type=int, default=128, help="Display height")
+    parser.add_argument("--rotation", type=int, default=0, help="Rotation in degrees")
+    parser.add_argument("--mirror-x", action="store_true", help="Mirror X axis")
+    parser.add_argument("--mirror-y", action="store_true", help="Mirror Y axis")
+    parser.add_argument("--compression", action="store_true", help="Use compression")
+    parser.add_argument("--no-red", action="store_true", help="Disable red channel")
+    parser.add_argument("--dither", action="store_true",
+                        help="Floyd-Steinberg dither instead of thresholding (for photos)")
+    parser.add_argument("--chunk-size", type=int, default=240,
+                        help="Image bytes per packet, capped by the negotiated MTU (default: 240)")
+    parser.add_argument("--window", type=int, default=1,
+                        help="Image packets to keep in flight before waiting for acks (default: 1)")
+    parser.add_argument("--scan-timeout", type=int, default=10, help="BLE scan timeout in seconds")
+    parser.add_argument("--connection-timeout", type=int, default=30, help="BLE connection timeout in seconds")
+    parser.add_argument("--scan-devices", action="store_true", help="Scan for all BLE devices and exit")
+    parser.add_argument("--find-gicisky", action="store_true", help="Find Gicisky-like devices and exit")
+    parser.add_argument("--interactive", action="store_true", help="Interactive device selection")
+    parser.add_argument("--test-connection", help="Test connection to specific device address/name")
+    
+    args = parser.parse_args(argv)
+    
+    # Handle scanning-only commands
+    if args.scan_devices:
+        _LOGGER.info("Scanning for all BLE devices...")
+        devices = await scan_for_devices(timeout=args.scan_timeout)
+        if devices:
+            print(f"\n📱 Found {len(devices)} devices:")
+            for i, device in enumerate(devices, 1):
+                print(f"   {i}. {device.name or 'Unknown'} ({device.address})")
         else:
-            _LOGGER.error("Failed to write image")
+            print("❌ No devices found")
+        return 0
+    
+    if args.find_gicisky:
+        devices = await find_gicisky_devices(timeout=args.scan_timeout)
+        return 0
+    
+    if args.interactive:
+        device = await interactive_device_selection(timeout=args.scan_timeout)
+        if device:
+            print(f"\n✅ Selected device: {device.name or 'Unknown'} ({device.address})")
+        return 0
+    
+    if args.test_connection:
+        success = await test_device_connection(args.test_connection, args.scan_timeout, args.connection_timeout)
+        if success:
+            print("\n✅ Device connection test PASSED")
+            return 0
+        print("\n❌ Device connection test FAILED")
+        return 1
     
-    asyncio.run(main())
+    # Validate required arguments for image writing
+    if not args.image or not args.device:
+        parser.error("image and --device are required when not using scan-only commands")
+    
+    # Create device config
+    device_config = DeviceConfig(
+        width=args.width,
+        height=args.height,
+        red=not args.no_red,
+        rotation=args.rotation,
+        mirror_x=args.mirror_x,
+        mirror_y=args.mirror_y,
+        compression=args.compression,
+        window=args.window,
+        chunk_size=args.chunk_size,
+        dither=args.dither
+    )
+    
+    success = await write_image_to_tag(
+        args.device, 
+        args.image,
+        args.threshold,
+        args.red_threshold,
+        device_config,
+        args.scan_timeout,
+        args.connection_timeout
+    )
+    
+    if success:
+        _LOGGER.info("Image written successfully!")
+        return 0
+    _LOGGER.error("Failed to write image")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
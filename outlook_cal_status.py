@@ -3,28 +3,49 @@
 Outlook Calendar Status
 """
 
+from __future__ import annotations
+
 # Standard library imports
 import argparse
 import asyncio
+import functools
 import hashlib
 import json
 import logging
 import os
+import pickle
+import re
 import signal
 import sys
-from datetime import datetime, timezone, timedelta
-from typing import Optional, Tuple, Dict, Any
+from datetime import date, datetime, timezone, timedelta
+from typing import TYPE_CHECKING, Optional, Tuple, Dict, Any
 
 # Third-party imports
 import requests
+from requests.adapters import HTTPAdapter
 from icalendar import Calendar
-from PIL import Image, ImageDraw, ImageFont
+
+# PIL is only needed to render a changed status; it is imported there so unchanged runs skip it
+if TYPE_CHECKING:
+    from PIL import Image, ImageDraw, ImageFont
 
 
 
 # Configuration
 DEFAULT_CHECK_WINDOW_MINUTES = 5
 STATUS_FILE = "calendar_status.json"  # File to track previous status
+CALENDAR_CACHE_FILE = "calendar_cache.json"  # HTTP validators of the last ICS body
+# The raw body (.ics) and its parsed Calendar (.pkl) are kept next to it, same name
+
+# Summary phrases that mark an event as Out of Office (matched anywhere, any case)
+_OOO_RE = re.compile(r'out of office|ooo|vacation|off work|holiday|away', re.IGNORECASE)
+
+# The only colors a tri-color tag can show; images are rendered as palette indices into this
+STATUS_PALETTE = [
+    255, 255, 255,  # white
+    255, 0, 0,      # red
+    0, 0, 0,        # black
+]
 
 # Supported tag sizes
 TAG_SIZES = {
@@ -35,24 +56,31 @@ TAG_SIZES = {
     "7.5": (640, 384),     # 7.5 inch display
 }
 
+# Shared HTTP session: repeated fetches in one process reuse the open TLS connection
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
-def create_status_hash(status: str, start_time: Optional[datetime], end_time: Optional[datetime], 
-                      next_event_time: Optional[datetime]) -> str:
-    """Create a hash of the current status for comparison"""
-    # Convert datetime objects to ISO strings for consistent hashing
-    start_str = start_time.isoformat() if start_time else ""
-    end_str = end_time.isoformat() if end_time else ""
-    next_str = next_event_time.isoformat() if next_event_time else ""
-    
-    # Create a string representation of the status
-    status_string = f"{status}|{start_str}|{end_str}|{next_str}"
-    
-    # Return SHA256 hash
-    return hashlib.sha256(status_string.encode()).hexdigest()
+def create_status_key(status: str, start_time: Optional[datetime], end_time: Optional[datetime],
+                      next_event_time: Optional[datetime]) -> Tuple[str, int, int, int]:
+    """Fingerprint of the current status: the status plus its event times as epoch seconds"""
+    return (
+        status,
+        int(start_time.timestamp()) if start_time else 0,
+        int(end_time.timestamp()) if end_time else 0,
+        int(next_event_time.timestamp()) if next_event_time else 0,
+    )
+
+
+def create_image_hash(image: Image.Image) -> str:
+    """Hash the rendered pixels (with mode and size) to spot visually identical updates"""
+    digest = hashlib.blake2b(f"{image.mode}{image.size}".encode(), digest_size=16)
+    digest.update(image.tobytes())
+    return digest.hexdigest()
 
 
 def load_previous_status(status_file: str = STATUS_FILE) -> Optional[Dict[str, Any]]:
@@ -72,9 +100,26 @@ def load_previous_status(status_file: str = STATUS_FILE) -> Optional[Dict[str, A
         return None
 
 
+def _write_atomic(path: str, data: str | bytes) -> None:
+    """Write text or bytes via a temp file and os.replace so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb' if isinstance(data, bytes) else 'w') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def save_image_atomic(image: Image.Image, path: str) -> None:
+    """Save image via a temp file and os.replace so the tag is never sent a half-written PNG"""
+    root, ext = os.path.splitext(path)
+    # Keep the extension last so PIL still picks the format from it
+    tmp_path = f"{root}.tmp{ext}"
+    image.save(tmp_path)
+    os.replace(tmp_path, path)
+
+
 def save_current_status(status: str, start_time: Optional[datetime], end_time: Optional[datetime], 
-                       next_event_time: Optional[datetime], status_hash: str, 
-                       status_file: str = STATUS_FILE) -> bool:
+                       next_event_time: Optional[datetime], status_key: Tuple[str, int, int, int], 
+                       status_file: str = STATUS_FILE, image_hash: Optional[str] = None) -> bool:
     """Save the current status to file"""
     try:
         data = {
@@ -83,11 +128,12 @@ def save_current_status(status: str, start_time: Optional[datetime], end_time: O
             "start_time": start_time.isoformat() if start_time else None,
             "end_time": end_time.isoformat() if end_time else None,
             "next_event_time": next_event_time.isoformat() if next_event_time else None,
-            "status_hash": status_hash
+            "status_key": list(status_key),
+            "image_hash": image_hash
         }
         
-        with open(status_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        # The wrapper reads this file to decide whether to push, so never leave it half-written
+        _write_atomic(status_file, json.dumps(data, indent=2))
             
         logger.debug(f"Saved current status to {status_file}")
         return True
@@ -97,38 +143,132 @@ def save_current_status(status: str, start_time: Optional[datetime], end_time: O
         return False
 
 
-def has_status_changed(current_hash: str, previous_data: Optional[Dict[str, Any]]) -> Tuple[bool, str]:
+def has_status_changed(current_key: Tuple[str, int, int, int],
+                       previous_data: Optional[Dict[str, Any]]) -> Tuple[bool, str]:
     """Check if the status has changed compared to previous run"""
     if previous_data is None:
         return True, "No previous status found"
     
-    previous_hash = previous_data.get("status_hash", "")
+    # Stored as a JSON array
+    previous_key = tuple(previous_data.get("status_key") or ())
     
-    if current_hash != previous_hash:
-        return True, f"Status changed (hash: {previous_hash[:8]}... -> {current_hash[:8]}...)"
+    if current_key != previous_key:
+        return True, f"Status changed ({list(previous_key)} -> {list(current_key)})"
     else:
-        return False, f"Status unchanged (hash: {current_hash[:8]}...)"
+        return False, f"Status unchanged ({current_key[0]})"
 
 
-def get_calendar_events(ics_url: str) -> Optional[Calendar]:
+def load_calendar_cache(ics_url: str, cache_file: str = CALENDAR_CACHE_FILE) -> Optional[Dict[str, Any]]:
+    """Load the cached ICS body and validators, if they belong to this URL"""
+    try:
+        if not os.path.exists(cache_file):
+            return None
+
+        with open(cache_file, 'r') as f:
+            data = json.load(f)
+        if data.get("url") != ics_url:
+            logger.debug(f"Calendar cache {cache_file} is for another URL, ignoring")
+            return None
+        with open(os.path.splitext(cache_file)[0] + ".ics", 'rb') as f:
+            data["body"] = f.read()
+        return data
+
+    except (json.JSONDecodeError, IOError) as e:
+        logger.warning(f"Error loading calendar cache from {cache_file}: {e}")
+        return None
+
+
+def save_calendar_cache(ics_url: str, response: requests.Response, body: bytes,
+                        cache_file: str = CALENDAR_CACHE_FILE) -> bool:
+    """Save the ICS body with its ETag/Last-Modified so the next fetch can be conditional"""
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        # Nothing to revalidate with; a cached body would never be reused
+        return False
+
+    try:
+        data = {
+            "url": ics_url,
+            "etag": etag,
+            "last_modified": last_modified
+        }
+        # Body first: validators must never point at a body that isn't there
+        _write_atomic(os.path.splitext(cache_file)[0] + ".ics", body)
+        _write_atomic(cache_file, json.dumps(data))
+
+        logger.debug(f"Saved calendar cache to {cache_file}")
+        return True
+
+    except IOError as e:
+        logger.warning(f"Error saving calendar cache to {cache_file}: {e}")
+        return False
+
+
+def parse_calendar(body: bytes, pickle_file: Optional[str] = None) -> Calendar:
+    """Parse an ICS body, reusing the pickled Calendar when the body hasn't changed"""
+    body_hash = hashlib.blake2b(body, digest_size=16).hexdigest()
+    if pickle_file and os.path.exists(pickle_file):
+        try:
+            with open(pickle_file, 'rb') as f:
+                # The hash is pickled first so a stale calendar is never unpickled
+                if pickle.load(f) == body_hash:
+                    cal = pickle.load(f)
+                    logger.debug(f"Loaded parsed calendar from {pickle_file}")
+                    return cal
+        except Exception as e:
+            logger.debug(f"Unusable parsed calendar cache {pickle_file}: {e}")
+
+    cal = Calendar.from_ical(body)
+
+    if pickle_file:
+        try:
+            # Pickle into memory first so a failed dump or a crash never leaves a truncated cache
+            _write_atomic(pickle_file, pickle.dumps(body_hash, pickle.HIGHEST_PROTOCOL)
+                          + pickle.dumps(cal, pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            logger.debug(f"Could not write parsed calendar cache {pickle_file}: {e}")
+    return cal
+
+
+def get_calendar_events(ics_url: str, cache_file: Optional[str] = CALENDAR_CACHE_FILE) -> Optional[Calendar]:
     """
     Fetches and parses calendar events from an ICS URL.
+    With a cache file the fetch is conditional, and a 304 reuses the cached body.
     """
     try:
         logger.info(f"Fetching calendar from: {ics_url}")
-        response = requests.get(ics_url, timeout=60)
+        cached = load_calendar_cache(ics_url, cache_file) if cache_file else None
+        pickle_file = os.path.splitext(cache_file)[0] + ".pkl" if cache_file else None
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers['If-None-Match'] = cached["etag"]
+            if cached.get("last_modified"):
+                headers['If-Modified-Since'] = cached["last_modified"]
+        response = _SESSION.get(ics_url, timeout=60, headers=headers)
+
+        if response.status_code == 304 and cached:
+            # The status still depends on the current time, so the cached body is parsed as usual
+            logger.info("📦 Calendar not modified, using cached copy")
+            cal = parse_calendar(cached["body"], pickle_file)
+            logger.info("Calendar parsed successfully")
+            return cal
+
         response.raise_for_status()
         
         # Check Content-Type header to reliably detect HTML content
         content_type = response.headers.get('content-type', '').lower()
-        response_text = response.text.strip()
+        # icalendar decodes the raw bytes itself (UTF-8, the iCalendar default), so the
+        # body is never decoded into a separate str here
+        body = response.content.strip()
         
         # Check if response is HTML based on Content-Type header first, then fallback to content inspection
         is_html = (
             'text/html' in content_type or 
             'application/xhtml+xml' in content_type or
             # Fallback to content inspection for servers with incorrect headers
-            (response_text.startswith('<') and ('html' in response_text.lower()[:200] or 'DOCTYPE' in response_text[:200]))
+            (body.startswith(b'<') and (b'html' in body[:200].lower() or b'DOCTYPE' in body[:200]))
         )
         
         if is_html:
@@ -138,7 +278,7 @@ def get_calendar_events(ics_url: str) -> Optional[Calendar]:
             logger.error("   • The calendar URL requires authentication")
             logger.error("   • The calendar is private and not publicly accessible") 
             logger.error("   • The URL format has changed")
-            logger.error(f"   Response preview: {response_text[:200]}...")
+            logger.error(f"   Response preview: {body[:200].decode('utf-8', 'replace')}...")
             return None
         
         # Check if Content-Type suggests iCalendar format
@@ -147,8 +287,10 @@ def get_calendar_events(ics_url: str) -> Optional[Calendar]:
             logger.warning("   Expected: text/calendar, application/ics, or text/plain")
             logger.warning("   Attempting to parse anyway...")
         
-        cal = Calendar.from_ical(response_text)
+        cal = parse_calendar(body, pickle_file)
         logger.info("Calendar fetched and parsed successfully")
+        if cache_file:
+            save_calendar_cache(ics_url, response, body, cache_file)
         return cal
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching calendar: {e}")
@@ -162,6 +304,12 @@ def get_calendar_events(ics_url: str) -> Optional[Calendar]:
         return None
 
 
+# icalendar stores property names upper-cased, so reading the underlying dict directly
+# skips CaselessDict's to_unicode()/upper() on every lookup in the event loop
+_DTSTART, _DTEND, _TRANSP, _STATUS, _SUMMARY = 'DTSTART', 'DTEND', 'TRANSP', 'STATUS', 'SUMMARY'
+_get_property = dict.get
+
+
 def get_current_status(calendar: Calendar, check_window_minutes: int = 5) -> Tuple[str, Optional[datetime], Optional[datetime], Optional[datetime]]:
     """
     Determines if the user is currently busy or free based on calendar events.
@@ -180,96 +328,95 @@ def get_current_status(calendar: Calendar, check_window_minutes: int = 5) -> Tup
     upcoming_event = None
     next_future_event = None
     
-    for component in calendar.walk():
+    # Events are direct children of VCALENDAR; no need for walk()'s recursive generator
+    for component in calendar.subcomponents:
         if component.name == "VEVENT":
-            try:
-                dtstart_comp = component.get('dtstart')
-                dtend_comp = component.get('dtend')
+            dtstart_comp = _get_property(component, _DTSTART)
+            dtend_comp = _get_property(component, _DTEND)
 
-                if not dtstart_comp or not dtend_comp:
-                    continue
+            if not dtstart_comp or not dtend_comp:
+                continue
 
+            try:
                 dtstart = dtstart_comp.dt
                 dtend = dtend_comp.dt
+            except AttributeError as e:
+                logger.warning(f"Error processing event: {e}")
+                continue
 
-                # Handle all-day events and ensure all are datetime objects
-                from datetime import date as date_class
-                
-                if isinstance(dtstart, date_class) and not isinstance(dtstart, datetime):
-                    dtstart = datetime.combine(dtstart, datetime.min.time()).replace(tzinfo=timezone.utc)
-                elif isinstance(dtstart, str):
-                    continue
-                
-                if isinstance(dtend, date_class) and not isinstance(dtend, datetime):
-                    dtend = datetime.combine(dtend, datetime.min.time()).replace(tzinfo=timezone.utc)
-                elif isinstance(dtend, str):
-                    continue
-
-                if not isinstance(dtstart, datetime) or not isinstance(dtend, datetime):
-                    logger.debug(f"Skipping event with non-datetime objects")
-                    continue
-
-                if dtstart.tzinfo is None:
-                    dtstart = dtstart.replace(tzinfo=timezone.utc)
-                if dtend.tzinfo is None:
-                    dtend = dtend.replace(tzinfo=timezone.utc)
-
-                # Check for transparency
-                transp = component.get('TRANSP')
-                is_busy_event = True
-                if transp and str(transp).upper() == 'TRANSPARENT':
-                    is_busy_event = False
-                
-                # Check for cancelled events
-                status = component.get('STATUS')
-                if status and str(status).upper() == 'CANCELLED':
-                    continue
-
-                # Check for "Out of Office" events
-                summary = component.get('SUMMARY', '')
-                is_out_of_office = False
-                if summary:
-                    summary_str = str(summary).lower()
-                    if any(phrase in summary_str for phrase in ['out of office', 'ooo', 'vacation', 'off work', 'holiday', 'away']):
-                        is_out_of_office = True
-
-                if not is_busy_event and not is_out_of_office:
-                    continue
-
-                # Check if currently in meeting or out of office
-                if dtstart <= now_utc < dtend:
-                    if is_out_of_office:
-                        current_event = (dtstart, dtend, 'out_of_office')
-                        # Don't break here - we want to prioritize OOO over regular meetings
-                        # But if we already found an OOO event, we can break
-                        if current_event and current_event[2] == 'out_of_office':
-                            break
-                    else:
-                        # Only set as busy if we haven't already found an OOO event
-                        if current_event is None or current_event[2] != 'out_of_office':
-                            current_event = (dtstart, dtend, 'busy')
-                
-                # Check if meeting starts within the window
-                elif now_utc <= dtstart < window_end:
+            # Handle all-day events and ensure all are datetime objects
+            if isinstance(dtstart, date) and not isinstance(dtstart, datetime):
+                dtstart = datetime.combine(dtstart, datetime.min.time()).replace(tzinfo=timezone.utc)
+            elif isinstance(dtstart, str):
+                continue
+            
+            if isinstance(dtend, date) and not isinstance(dtend, datetime):
+                dtend = datetime.combine(dtend, datetime.min.time()).replace(tzinfo=timezone.utc)
+            elif isinstance(dtend, str):
+                continue
+
+            if not isinstance(dtstart, datetime) or not isinstance(dtend, datetime):
+                logger.debug(f"Skipping event with non-datetime objects")
+                continue
+
+            if dtstart.tzinfo is None:
+                dtstart = dtstart.replace(tzinfo=timezone.utc)
+            if dtend.tzinfo is None:
+                dtend = dtend.replace(tzinfo=timezone.utc)
+
+            # Most events of a long-lived calendar are over or too far out; drop them
+            # before looking at any other property
+            if dtend < now_utc or dtstart >= future_window:
+                continue
+
+            # Check for transparency
+            transp = _get_property(component, _TRANSP)
+            is_busy_event = True
+            if transp and str(transp).upper() == 'TRANSPARENT':
+                is_busy_event = False
+            
+            # Check for cancelled events
+            status = _get_property(component, _STATUS)
+            if status and str(status).upper() == 'CANCELLED':
+                continue
+
+            # Check for "Out of Office" events
+            summary = _get_property(component, _SUMMARY, '')
+            is_out_of_office = bool(summary) and _OOO_RE.search(str(summary)) is not None
+
+            if not is_busy_event and not is_out_of_office:
+                continue
+
+            # Check if currently in meeting or out of office
+            if dtstart <= now_utc < dtend:
+                if is_out_of_office:
+                    current_event = (dtstart, dtend, 'out_of_office')
+                    # Don't break here - we want to prioritize OOO over regular meetings
+                    # But if we already found an OOO event, we can break
+                    if current_event and current_event[2] == 'out_of_office':
+                        break
+                else:
+                    # Only set as busy if we haven't already found an OOO event
+                    if current_event is None or current_event[2] != 'out_of_office':
+                        current_event = (dtstart, dtend, 'busy')
+            
+            # Check if meeting starts within the window
+            elif now_utc <= dtstart < window_end:
+                if is_out_of_office:
+                    if upcoming_event is None or dtstart < upcoming_event[0] or upcoming_event[2] != 'out_of_office':
+                        upcoming_event = (dtstart, dtend, 'out_of_office')
+                else:
+                    # Only set as busy if we haven't found an OOO event or this is earlier
+                    if upcoming_event is None or (dtstart < upcoming_event[0] and upcoming_event[2] != 'out_of_office'):
+                        upcoming_event = (dtstart, dtend, 'busy')
+            
+            # Check for next future event (beyond the immediate window)
+            elif now_utc < dtstart < future_window:
+                if next_future_event is None or dtstart < next_future_event[0]:
                     if is_out_of_office:
-                        if upcoming_event is None or dtstart < upcoming_event[0] or upcoming_event[2] != 'out_of_office':
-                            upcoming_event = (dtstart, dtend, 'out_of_office')
+                        next_future_event = (dtstart, dtend, 'out_of_office')
                     else:
-                        # Only set as busy if we haven't found an OOO event or this is earlier
-                        if upcoming_event is None or (dtstart < upcoming_event[0] and upcoming_event[2] != 'out_of_office'):
-                            upcoming_event = (dtstart, dtend, 'busy')
-                
-                # Check for next future event (beyond the immediate window)
-                elif now_utc < dtstart < future_window:
-                    if next_future_event is None or dtstart < next_future_event[0]:
-                        if is_out_of_office:
-                            next_future_event = (dtstart, dtend, 'out_of_office')
-                        else:
-                            next_future_event = (dtstart, dtend, 'busy')
-                        
-            except Exception as e:
-                logger.warning(f"Error processing event: {e}")
-                continue
+                        next_future_event = (dtstart, dtend, 'busy')
 
     # Determine status
     if current_event:
@@ -302,8 +449,22 @@ def get_current_status(calendar: Calendar, check_window_minutes: int = 5) -> Tup
         return "Free", None, None, next_start
 
 
+# First font file that loaded, so other sizes skip the paths that failed
+_FONT_PATH: Optional[str] = None
+
+
+@functools.lru_cache(maxsize=32)
 def get_font(size: int) -> ImageFont.ImageFont:
     """Load font with fallback to default if custom fonts not available."""
+    from PIL import ImageFont
+
+    global _FONT_PATH
+    if _FONT_PATH:
+        try:
+            return ImageFont.truetype(_FONT_PATH, size)
+        except (IOError, OSError):
+            _FONT_PATH = None
+
     font_paths = [
         "/System/Library/Fonts/Arial.ttf",  # macOS
         "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Linux
@@ -312,21 +473,42 @@ def get_font(size: int) -> ImageFont.ImageFont:
     
     for font_path in font_paths:
         try:
-            return ImageFont.truetype(font_path, size)
+            font = ImageFont.truetype(font_path, size)
         except (IOError, OSError):
             continue
+        _FONT_PATH = font_path
+        return font
     
     return ImageFont.load_default()
 
 
+# textbbox results by (text, font, image mode); the labels repeat on every render
+_TEXT_BBOXES: Dict[Tuple[str, Any, str], Tuple[float, float, float, float]] = {}
+_TEXT_BBOXES_MAX = 256
+
+
+def measure_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont) -> Tuple[float, float, float, float]:
+    """Bounding box of text drawn at the origin, cached across renders"""
+    key = (text, font, draw.mode)
+    bbox = _TEXT_BBOXES.get(key)
+    if bbox is None:
+        if len(_TEXT_BBOXES) >= _TEXT_BBOXES_MAX:
+            _TEXT_BBOXES.clear()
+        bbox = _TEXT_BBOXES[key] = draw.textbbox((0, 0), text, font=font)
+    return bbox
+
+
 def create_status_image(status: str, start_time: Optional[datetime], end_time: Optional[datetime], 
                        next_event_time: Optional[datetime] = None, tag_size: str = "2.9") -> Image.Image:
     """Creates a status image for the e-ink display."""
+    from PIL import Image, ImageDraw
+
     if tag_size not in TAG_SIZES:
         raise ValueError(f"Unsupported tag size: {tag_size}")
     
     width, height = TAG_SIZES[tag_size]
-    img = Image.new('RGB', (width, height), 'white')
+    img = Image.new('P', (width, height), 0)
+    img.putpalette(STATUS_PALETTE)
     draw = ImageDraw.Draw(img)
     
     # Proportional font sizes and dimensions
@@ -352,7 +534,7 @@ def create_status_image(status: str, start_time: Optional[datetime], end_time: O
         
         # Center "BUSY" text in red section
         busy_text = "BUSY"
-        busy_bbox = draw.textbbox((0, 0), busy_text, font=font_large)
+        busy_bbox = measure_text(draw, busy_text, font_large)
         busy_width = busy_bbox[2] - busy_bbox[0]
         busy_height = busy_bbox[3] - busy_bbox[1]
         busy_x = (width - busy_width) // 2
@@ -362,7 +544,7 @@ def create_status_image(status: str, start_time: Optional[datetime], end_time: O
         # Bottom white section with time
         if start_time and end_time:
             time_text = f"{start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}"
-            time_bbox = draw.textbbox((0, 0), time_text, font=font_medium)
+            time_bbox = measure_text(draw, time_text, font_medium)
             time_width = time_bbox[2] - time_bbox[0]
             time_height = time_bbox[3] - time_bbox[1]
             time_x = (width - time_width) // 2
@@ -382,7 +564,7 @@ def create_status_image(status: str, start_time: Optional[datetime], end_time: O
         
         # Red "Out of Office" text higher up
         ooo_text = "Out of Office"
-        ooo_bbox = draw.textbbox((0, 0), ooo_text, font=font_large)
+        ooo_bbox = measure_text(draw, ooo_text, font_large)
         ooo_width = ooo_bbox[2] - ooo_bbox[0]
         ooo_height = ooo_bbox[3] - ooo_bbox[1]
         ooo_x = (width - ooo_width) // 2
@@ -418,7 +600,7 @@ def create_status_image(status: str, start_time: Optional[datetime], end_time: O
         # Calculate total height needed for all text lines
         line_heights = []
         for text, font in texts_to_draw:
-            line_bbox = draw.textbbox((0,0), text, font=font)
+            line_bbox = measure_text(draw, text, font)
             line_heights.append(line_bbox[3] - line_bbox[1])
         
         total_bottom_height = sum(line_heights) + (len(line_heights) - 1) * general_padding  # 5px spacing -> general_padding
@@ -427,7 +609,7 @@ def create_status_image(status: str, start_time: Optional[datetime], end_time: O
         # Draw all text lines
         current_y = bottom_start_y
         for i, (text, font) in enumerate(texts_to_draw):
-            bbox = draw.textbbox((0, 0), text, font=font)
+            bbox = measure_text(draw, text, font)
             text_width = bbox[2] - bbox[0]
             text_x = (width - text_width) // 2
             draw.text((text_x, current_y), text, font=font, fill='black')
@@ -440,7 +622,7 @@ def create_status_image(status: str, start_time: Optional[datetime], end_time: O
         
         # Center "FREE" text in black section
         free_text = "FREE"
-        free_bbox = draw.textbbox((0, 0), free_text, font=font_large)
+        free_bbox = measure_text(draw, free_text, font_large)
         free_width = free_bbox[2] - free_bbox[0]
         free_height = free_bbox[3] - free_bbox[1]
         free_x = (width - free_width) // 2
@@ -463,8 +645,8 @@ def create_status_image(status: str, start_time: Optional[datetime], end_time: O
             next_text = "No upcoming events"
         
         # Position both lines of text
-        time_bbox = draw.textbbox((0, 0), time_text, font=font_medium)
-        next_bbox = draw.textbbox((0, 0), next_text, font=font_small)
+        time_bbox = measure_text(draw, time_text, font_medium)
+        next_bbox = measure_text(draw, next_text, font_small)
         
         total_height_text = (time_bbox[3] - time_bbox[1]) + (next_bbox[3] - next_bbox[1]) + general_padding  # 5px spacing -> general_padding
         start_y_text = top_height + (height - top_height - total_height_text) // 2
@@ -482,7 +664,7 @@ def create_status_image(status: str, start_time: Optional[datetime], end_time: O
 
     else:  # Error
         error_text = "Calendar Error"
-        error_bbox = draw.textbbox((0, 0), error_text, font=font_medium)
+        error_bbox = measure_text(draw, error_text, font_medium)
         error_width = error_bbox[2] - error_bbox[0]
         error_height = error_bbox[3] - error_bbox[1]
         error_x = (width - error_width) // 2
@@ -494,36 +676,39 @@ def create_status_image(status: str, start_time: Optional[datetime], end_time: O
 
 
 
-async def main():
-
-    parser = argparse.ArgumentParser(description="Outlook Calendar Status to Image")
-    parser.add_argument("--ics-url", default="", help="Outlook ICS calendar URL")
-    parser.add_argument("--tag-size", choices=["1.54", "2.1", "2.9", "4.2", "7.5"], default="2.9",
-                       help="Tag size in inches (default: 2.9)")
-    parser.add_argument("--check-window", type=int, default=DEFAULT_CHECK_WINDOW_MINUTES,
-                       help=f"Minutes to check ahead for meetings (default: {DEFAULT_CHECK_WINDOW_MINUTES})")
-    parser.add_argument("--save-image", help="Save generated image to this path")
-    parser.add_argument("--status-file", default=STATUS_FILE,
-                       help=f"File to track status changes (default: {STATUS_FILE})")
-    parser.add_argument("--force-update", action="store_true",
-                       help="Force image generation even if status hasn't changed")
-    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
-    
-    args = parser.parse_args()
-    
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
-    
-
-    if not args.ics_url.startswith(('http://', 'https://')):
-        logger.error("ICS URL must start with http:// or https://")
-        return 1
-    
-    logger.info("OUTLOOK CALENDAR STATUS SCRIPT")
-    logger.info("=" * 50)
-    
-    # Fetch calendar
-    calendar = get_calendar_events(args.ics_url)
+def _save_tag_sizes(status: str, start_time: Optional[datetime], end_time: Optional[datetime],
+                    next_event_time: Optional[datetime], base_path: str,
+                    primary_size: str, primary_image: Image.Image) -> list:
+    """Save every tag size one after another, reusing the already rendered primary size"""
+    root, ext = os.path.splitext(base_path)
+    paths = []
+    for tag_size in TAG_SIZES:
+        path = f"{root}_{tag_size}{ext or '.png'}"
+        image = primary_image if tag_size == primary_size else create_status_image(
+            status, start_time, end_time, next_event_time, tag_size)
+        save_image_atomic(image, path)
+        paths.append(path)
+    return paths
+
+
+async def save_all_tag_sizes(status: str, start_time: Optional[datetime], end_time: Optional[datetime],
+                             next_event_time: Optional[datetime], base_path: str,
+                             primary_size: str, primary_image: Image.Image) -> list:
+    """Render every tag size in a worker thread, saved next to base_path as <name>_<size><ext>"""
+    # One thread, sequential renders: get_font() hands out shared cached fonts, which aren't
+    # safe to use from several threads at once
+    return await asyncio.to_thread(_save_tag_sizes, status, start_time, end_time, next_event_time,
+                                   base_path, primary_size, primary_image)
+
+
+async def update_status(args) -> int:
+    """Fetch the calendar once and regenerate the image if the status changed"""
+    # Fetch calendar, reading the previous status while the request is in flight; threads also
+    # keep the event loop free (daemon signal handling) during the blocking fetch
+    calendar, previous_status = await asyncio.gather(
+        asyncio.to_thread(get_calendar_events, args.ics_url, args.cache_file),
+        asyncio.to_thread(load_previous_status, args.status_file),
+    )
     if not calendar:
         logger.error("Failed to fetch or parse calendar")
         return 1
@@ -534,14 +719,11 @@ async def main():
     if start_time and end_time:
         logger.info(f"⏰ Event time: {start_time.strftime('%Y-%m-%d %H:%M')} to {end_time.strftime('%Y-%m-%d %H:%M')}")
     
-    # Create hash of current status
-    current_hash = create_status_hash(status, start_time, end_time, next_event_time)
-    
-    # Load previous status
-    previous_status = load_previous_status(args.status_file)
+    # Fingerprint the current status
+    current_key = create_status_key(status, start_time, end_time, next_event_time)
     
     # Check if status has changed
-    status_changed, change_reason = has_status_changed(current_hash, previous_status)
+    status_changed, change_reason = has_status_changed(current_key, previous_status)
     
     # Check if image file exists (but don't update based on age alone to preserve battery)
     image_path = args.save_image if args.save_image else "status_output.png"
@@ -566,14 +748,32 @@ async def main():
     # Generate image
     logger.info(f"🖼️  Generating {args.tag_size}\" tag image...")
     image = create_status_image(status, start_time, end_time, next_event_time, args.tag_size)
+    image_hash = create_image_hash(image)
+    
+    # A new status can still render the same pixels. Leave the image untouched then, so the
+    # wrapper sees nothing new to push to the tag
+    if (not args.force_update and not image_missing and previous_status
+            and previous_status.get("image_hash") == image_hash):
+        logger.info("⏭️  Rendered image identical to the saved one, skipping save")
+        # Still record the new status key, or every later run would see a change and re-render
+        if not save_current_status(status, start_time, end_time, next_event_time, current_key,
+                                   args.status_file, image_hash):
+            logger.warning(f"⚠️ Failed to save status to {args.status_file}")
+        return 0
     
     # Save image (use default filename if none provided)
     save_path = args.save_image if args.save_image else "status_output.png"
-    image.save(save_path)
+    save_image_atomic(image, save_path)
     logger.info(f"💾 Image saved to {save_path}")
     
+    if args.all_sizes:
+        paths = await save_all_tag_sizes(status, start_time, end_time, next_event_time, save_path,
+                                         args.tag_size, image)
+        logger.info(f"💾 Saved {len(paths)} tag sizes: {', '.join(paths)}")
+    
     # Save current status
-    if save_current_status(status, start_time, end_time, next_event_time, current_hash, args.status_file):
+    if save_current_status(status, start_time, end_time, next_event_time, current_key, args.status_file,
+                           image_hash):
         logger.info(f"📄 Status saved to {args.status_file}")
     else:
         logger.warning(f"⚠️ Failed to save status to {args.status_file}")
@@ -582,6 +782,70 @@ async def main():
     return 0
 
 
+async def run_daemon(args) -> int:
+    """Update the status every check window until SIGTERM/SIGINT"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops have no signal handlers; Ctrl+C still interrupts
+            pass
+
+    logger.info(f"👀 DAEMON MODE: refreshing every {args.check_window} minutes")
+    while not stop.is_set():
+        if await update_status(args) != 0:
+            logger.error("💥 Status update failed, will retry next cycle")
+        # Refreshing once per look-ahead window means an upcoming meeting is never missed
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=args.check_window * 60)
+        except asyncio.TimeoutError:
+            pass
+
+    logger.info("🛑 Stopping daemon")
+    return 0
+
+
+async def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Outlook Calendar Status to Image")
+    parser.add_argument("--ics-url", default="", help="Outlook ICS calendar URL")
+    parser.add_argument("--tag-size", choices=["1.54", "2.1", "2.9", "4.2", "7.5"], default="2.9",
+                       help="Tag size in inches (default: 2.9)")
+    parser.add_argument("--check-window", type=int, default=DEFAULT_CHECK_WINDOW_MINUTES,
+                       help=f"Minutes to check ahead for meetings (default: {DEFAULT_CHECK_WINDOW_MINUTES})")
+    parser.add_argument("--save-image", help="Save generated image to this path")
+    parser.add_argument("--status-file", default=STATUS_FILE,
+                       help=f"File to track status changes (default: {STATUS_FILE})")
+    parser.add_argument("--cache-file", default=CALENDAR_CACHE_FILE,
+                       help=f"File caching the last calendar for conditional fetches (default: {CALENDAR_CACHE_FILE})")
+    parser.add_argument("--force-update", action="store_true",
+                       help="Force image generation even if status hasn't changed")
+    parser.add_argument("--all-sizes", action="store_true",
+                       help="Also save an image for every tag size, as <image>_<size>.png")
+    parser.add_argument("--daemon", action="store_true",
+                       help="Keep running, refreshing every --check-window minutes")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
+    
+    args = parser.parse_args(argv)
+    
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    
+
+    if not args.ics_url.startswith(('http://', 'https://')):
+        logger.error("ICS URL must start with http:// or https://")
+        return 1
+    
+    logger.info("OUTLOOK CALENDAR STATUS SCRIPT")
+    logger.info("=" * 50)
+    
+    if args.daemon:
+        return await run_daemon(args)
+    return await update_status(args)
+
+
 if __name__ == "__main__":
     if sys.platform == "win32" and sys.version_info >= (3, 8, 0):
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())